@@ -0,0 +1,144 @@
+# headless timings of ButtonCalendar's hot paths, on the in-memory fake_gui backend.
+# reports wall time and widget update() calls per operation, at several selection sizes
+# (for the canvas backend: canvas item configurations, two per repainted cell).
+#
+#     python benchmarks/bench_calendar.py [--json]
+
+import json
+import os
+import sys
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+sys.path.insert(0, HERE)
+
+import fake_gui
+
+fake_gui.install()
+
+from button_calendar import ButtonCalendar
+
+
+START = '2030-01-15'
+# selected dates in each run: none, a busy year, several years of weekdays
+SELECTION_SIZES = (0, 1000, 10000)
+
+
+def build_calendar(selected=0, **kwargs):
+    calendar = ButtonCalendar(yyyy_mm_dd=START, **kwargs)
+    calendar.window = fake_gui.Window('bench', layout=[[calendar.frame]])
+    calendar.post_finalize()
+    if selected:
+        first = calendar.grid.ordinals[0]
+        calendar.select_dates(range(first, first + selected))
+    return calendar
+
+
+# runs 'operation' 'number' times. returns (microseconds, widget updates) per call
+def measure(operation, number):
+    fake_gui.reset()
+    start = time.perf_counter()
+    for run in range(number):
+        operation()
+    elapsed = time.perf_counter() - start
+    return elapsed / number * 1e6, fake_gui.updates / number
+
+
+def bench_init(selected):
+    return measure(lambda: build_calendar(selected), 20)
+
+
+def bench_init_multi_month(selected):
+    return measure(lambda: build_calendar(selected, months=3), 10)
+
+
+def bench_init_canvas(selected):
+    return measure(lambda: build_calendar(selected, backend='canvas'), 20)
+
+
+def bench_refresh(selected, **kwargs):
+    calendar = build_calendar(selected, **kwargs)
+    events = iter(['forward_month', 'back_month'] * 500)
+    return measure(lambda: calendar.refresh(next(events)), 1000)
+
+
+def bench_refresh_canvas(selected):
+    return bench_refresh(selected, backend='canvas')
+
+
+def bench_toggle_date_button(selected):
+    calendar = build_calendar(selected)
+    btn = calendar.button_array[20]
+    return measure(lambda: calendar.toggle_date_button(btn, not btn.metadata.selected), 2000)
+
+
+def bench_toggle_week_button(selected):
+    calendar = build_calendar(selected)
+    return measure(lambda: calendar.toggle_week_button((14, 21)), 2000)
+
+
+# right click, sweep the hover across 4 weeks, left click
+def bench_range_select(selected):
+    calendar = build_calendar(selected)
+    window = calendar.window
+    sweep = ['date_btn_{}_mouse_over_'.format(ix) for ix in range(4, 32)]
+
+    def select_range():
+        calendar.handle_event('date_btn_3_right_click_', window)
+        for event in sweep:
+            calendar.handle_event(event, window)
+        calendar.handle_event('date_btn_31', window)
+
+    return measure(select_range, 200)
+
+
+# a mixed stream: foreign events, wheel scrolls, clicks and week toggles
+def bench_handle_event(selected):
+    calendar = build_calendar(selected)
+    window = calendar.window
+    stream = [
+        '-calendar-frame-_mouse_enter_', 'MouseWheel:Down', 'a', 'b', 'date_btn_17',
+        '-other-input-', 'MouseWheel:Up', 'week_select_3', 'Return:13', 'date_btn_17',
+        '-calendar-frame-_mouse_exit_', 'week_select_3',
+    ]
+
+    def run():
+        for event in stream:
+            calendar.handle_event(event, window)
+
+    us, updates = measure(run, 500)
+    return us / len(stream), updates / len(stream)
+
+
+BENCHMARKS = (
+    ('__init__', bench_init),
+    ('__init__ (3 months)', bench_init_multi_month),
+    ('__init__ (canvas)', bench_init_canvas),
+    ('refresh', bench_refresh),
+    ('refresh (canvas)', bench_refresh_canvas),
+    ('toggle_date_button', bench_toggle_date_button),
+    ('toggle_week_button', bench_toggle_week_button),
+    ('range select', bench_range_select),
+    ('handle_event', bench_handle_event),
+)
+
+
+def main():
+    results = []
+    for name, bench in BENCHMARKS:
+        for selected in SELECTION_SIZES:
+            us, updates = bench(selected)
+            results.append({'name': name, 'selected': selected, 'us': us, 'updates': updates})
+
+    if '--json' in sys.argv:
+        print(json.dumps(results, indent=1))
+        return
+
+    print('{:<22} {:>9} {:>12} {:>10}'.format('operation', 'selected', 'us/call', 'updates'))
+    for result in results:
+        print('{name:<22} {selected:>9} {us:>12.1f} {updates:>10.1f}'.format(**result))
+
+
+if __name__ == '__main__':
+    main()
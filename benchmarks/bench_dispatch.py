@@ -0,0 +1,78 @@
+# events/second of ButtonCalendar.handle_event vs. the previous string-matching handler,
+# for the events a framed calendar mostly sees: keystrokes, timers and other elements
+# of the host window.
+#
+#     python benchmarks/bench_dispatch.py
+
+import os
+import sys
+import timeit
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+sys.path.insert(0, HERE)
+
+import fake_gui
+
+fake_gui.install()
+
+from button_calendar import ButtonCalendar
+
+
+# the handler's parsing chain before table dispatch. for the events below it never
+# reaches a widget
+def legacy_handle_event(self, event, window):
+    if event == '-calendar-frame-_mouse_enter_':
+        self.mouse_over = True
+    elif event == '-calendar-frame-_mouse_exit_':
+        self.mouse_over = False
+
+    if event == 'MouseWheel:Up' and self.mouse_over == True:
+        event = 'back_month'
+    if event == 'MouseWheel:Down' and self.mouse_over == True:
+        event = 'forward_month'
+
+    if event in ['back_year', 'back_month', 'forward_year', 'forward_month']:
+        self.refresh(event)
+    if event.startswith('date_btn_') and not event.endswith('_'):
+        pass
+    if self.range_select_mode == True and event.startswith('date_btn_') and event.endswith('_mouse_over_'):
+        pass
+    if event.startswith('date_btn_') and event.endswith('_right_click_'):
+        pass
+    if event.startswith('week_select_'):
+        pass
+    return self
+
+
+# a busy form: typing, timers, other inputs, plus the odd frame enter/exit and
+# hovers outside 'range select' mode
+EVENTS = [
+    'a', 'b', 'Shift_L:16', 'BackSpace:8', '-name-', '-notes-', '-timer-', 'Return:13',
+    'MouseWheel:Down', '-calendar-frame-_mouse_enter_', 'date_btn_12_mouse_over_',
+    '-calendar-frame-_mouse_exit_', '-submit-', 'space:32', 'x', '-list-',
+] * 64
+
+
+def events_per_second(handler, calendar, repeat=5):
+    def run():
+        for event in EVENTS:
+            handler(calendar, event, None)
+
+    best = min(timeit.repeat(run, number=20, repeat=repeat))
+    return 20 * len(EVENTS) / best
+
+
+def main():
+    calendar = ButtonCalendar()
+
+    legacy = events_per_second(legacy_handle_event, calendar)
+    table = events_per_second(ButtonCalendar.handle_event, calendar)
+
+    print('legacy handler: {:>12,.0f} events/s'.format(legacy))
+    print('table dispatch: {:>12,.0f} events/s'.format(table))
+    print('speedup:        {:>12.1f}x'.format(table / legacy))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,68 @@
+# import cost of the headless core, the widget module, and the GUI stack it loads on demand.
+# each import runs in a fresh interpreter with -X importtime; the cumulative time of the
+# top-level module is reported (best of several runs). with PYTHONDONTWRITEBYTECODE set,
+# every run also pays for compiling the modules.
+#
+#     python benchmarks/bench_import.py
+
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+MODULES = (
+    'calendar_core',
+    'button_calendar',
+    'calendar_widgets', # imports PySimpleGUI (and tkinter)
+)
+
+
+# cumulative import time of 'module' in microseconds, or None if it can't be imported here
+def import_time(module):
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', 'import ' + module],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        return None
+
+    for line in result.stderr.splitlines():
+        # "import time:   self [us] |   cumulative | imported package"
+        parts = line.split('|')
+        if len(parts) == 3 and parts[2].strip() == module:
+            return int(parts[1])
+    return None
+
+
+def main(runs=5):
+    for module in MODULES:
+        times = [import_time(module) for run in range(runs)]
+        if None in times:
+            print('{:<18} not importable here'.format(module))
+            continue
+        print('{:<18} {:>8.1f} ms'.format(module, min(times) / 1000))
+
+    # a plain import must not drag the GUI in
+    check = subprocess.run(
+        [sys.executable, '-c', 'import sys, button_calendar; print("PySimpleGUI" in sys.modules)'],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+    )
+    print('PySimpleGUI loaded by "import button_calendar":', check.stdout.strip())
+
+    # nor pull in re (and enum), which e.g. calendar and json do
+    check = subprocess.run(
+        [sys.executable, '-c', 'import sys, button_calendar; print("re" in sys.modules)'],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+    )
+    print('re loaded by "import button_calendar":', check.stdout.strip())
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,97 @@
+# memory held by 100 live ButtonCalendars, on the in-memory fake_gui backend (a real Tk
+# widget adds its own cost per Date_Button on top, which the canvas backend avoids).
+# also compares the slotted per-date Cell with the metadata dict it replaced, and checks
+# how much a warm refresh allocates.
+#
+#     python benchmarks/bench_memory.py
+
+import os
+import sys
+import tracemalloc
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+sys.path.insert(0, HERE)
+
+import fake_gui
+
+fake_gui.install()
+
+from button_calendar import ButtonCalendar
+from calendar_core import Cell, month_grid
+
+INSTANCES = 100
+
+
+# bytes still allocated after building 'INSTANCES' calendars
+def calendars_memory(**kwargs):
+    tracemalloc.start()
+    start = tracemalloc.get_traced_memory()[0]
+    calendars = [ButtonCalendar(yyyy_mm_dd='2030-01-15', **kwargs) for instance in range(INSTANCES)]
+    used = tracemalloc.get_traced_memory()[0] - start
+    tracemalloc.stop()
+    del calendars
+    return used
+
+
+# bytes held by 42 * INSTANCES cell models, built by 'make'
+def cells_memory(make):
+    grid = month_grid(2030, 1)
+    tracemalloc.start()
+    start = tracemalloc.get_traced_memory()[0]
+    cells = [make(grid, ix) for ix in range(42 * INSTANCES)]
+    used = tracemalloc.get_traced_memory()[0] - start
+    tracemalloc.stop()
+    del cells
+    return used
+
+
+# the per-date metadata dict used before Cell
+def metadata_dict(grid, ix):
+    ix = ix % 42
+    return {
+        'selected': False,
+        'heat': None,
+        'events': (),
+        'date': grid.dates[ix],
+        'ordinal': grid.ordinals[ix],
+        'button_month': grid.months[ix],
+        'parent_month': grid.month,
+    }
+
+
+# peak bytes allocated by one refresh, once the neighbouring months are prefetched
+def refresh_allocation():
+    calendar = ButtonCalendar(yyyy_mm_dd='2030-01-15')
+    calendar.window = fake_gui.Window('bench', layout=[[calendar.frame]])
+    calendar.post_finalize()
+    for event in ('forward_month', 'back_month'):
+        calendar.prefetch()
+        calendar.refresh(event)
+    calendar.prefetch()
+
+    tracemalloc.start()
+    start = tracemalloc.get_traced_memory()[0]
+    calendar.refresh('forward_month')
+    peak = tracemalloc.get_traced_memory()[1] - start
+    tracemalloc.stop()
+    return peak
+
+
+def main():
+    for backend in ('buttons', 'canvas'):
+        used = calendars_memory(backend=backend)
+        print('{} calendars {:<9} {:>10,.0f} KiB  {:>8,.1f} KiB each'.format(
+            INSTANCES, '(' + backend + ')', used / 1024, used / 1024 / INSTANCES))
+
+    dicts = cells_memory(metadata_dict)
+    cells = cells_memory(Cell)
+    print('{} cells as dicts:      {:>10,.0f} KiB'.format(42 * INSTANCES, dicts / 1024))
+    print('{} cells as Cell:       {:>10,.0f} KiB  ({:.1f}x smaller)'.format(
+        42 * INSTANCES, cells / 1024, dicts / cells))
+
+    print('bytes allocated by a warm refresh: {:,}'.format(refresh_allocation()))
+
+
+if __name__ == '__main__':
+    main()
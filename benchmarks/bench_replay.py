@@ -0,0 +1,153 @@
+# replays a recorded event stream (see ButtonCalendar(record=...)) into a headless ButtonCalendar
+# on the fake_gui backend, as fast as it will go. reports throughput, per-kind handler latency and
+# the final selection, and whether that matches the one the recording ended with.
+# without a recording, replays a synthetic session of wheel scrolls, clicks and range selects.
+#
+#     ButtonCalendar(record='session.jsonl').window()    # record a session
+#     python benchmarks/bench_replay.py [session.jsonl] [--repeat N] [--json]
+
+import json
+import os
+import random
+import sys
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+sys.path.insert(0, HERE)
+
+import fake_gui
+
+fake_gui.install()
+
+from button_calendar import ButtonCalendar
+from calendar_core import Today, to_ordinal
+from calendar_recorder import Event_Recorder
+
+
+# a recording-shaped session: bursts of wheel scrolling, clicks on dates and weeks, range selects
+# with a hover sweep, keystrokes meant for other inputs, and idle timeouts between bursts
+def synthetic_session(actions=2000, seed=1):
+    rng = random.Random(seed)
+    events = ['-calendar-frame-_mouse_enter_']
+    for action in range(actions):
+        choice = rng.random()
+        if choice < 0.3:
+            wheel = rng.choice(('MouseWheel:Up', 'MouseWheel:Down'))
+            events.extend([wheel] * rng.randint(1, 12))
+        elif choice < 0.55:
+            events.append('date_btn_{}'.format(rng.randrange(7, 42)))
+        elif choice < 0.65:
+            events.append('week_select_{}'.format(rng.randrange(1, 6)))
+        elif choice < 0.8:
+            first = rng.randrange(7, 30)
+            last = rng.randrange(first, 42)
+            events.append('date_btn_{}_right_click_'.format(first))
+            events.extend('date_btn_{}_mouse_over_'.format(ix) for ix in range(first + 1, last + 1))
+            events.append('date_btn_{}'.format(last))
+        else:
+            events.extend(rng.choice(('a', 'b', 'BackSpace:8', '-notes-', 'Return:13')) for key in range(5))
+        events.append(fake_gui.TIMEOUT_KEY)
+
+    header = {
+        'yyyy_mm_dd': '2030-01-15',
+        'months': 1,
+        'backend': 'buttons',
+        'key_prefix': '',
+        'coalesce_navigation': True,
+        'today': '2030-01-01',
+        'selected': [],
+    }
+    return header, [(0.0, event, None) for event in events], None
+
+
+# pin Today to the recording's date, so the same dates are past (disabled) as when it was recorded
+def pin_today(yyyy_mm_dd):
+    Today._ordinal = to_ordinal(yyyy_mm_dd)
+    Today._expires = float('inf')
+
+
+def build_calendar(header):
+    calendar = ButtonCalendar(
+        yyyy_mm_dd=header['yyyy_mm_dd'],
+        months=header['months'],
+        backend=header['backend'],
+        key_prefix=header['key_prefix'],
+        coalesce_navigation=header['coalesce_navigation'],
+        instrument=True,
+    )
+    calendar.window = fake_gui.Window('replay', layout=[[calendar.frame]])
+    calendar.post_finalize()
+
+    # the selection the recording started with, as is (select_interval() would skip past dates)
+    selection = calendar.selected_dates
+    selection.difference_update(list(selection))
+    for first, last in header['selected']:
+        selection.update_range(to_ordinal(first), to_ordinal(last))
+    calendar.repaint_selection()
+    return calendar
+
+
+# returns (calendar, seconds) after feeding it every event
+def replay(header, events):
+    pin_today(header['today'])
+    calendar = build_calendar(header)
+    window = calendar.window
+    table = calendar.event_table
+
+    start = time.perf_counter()
+    for seconds, event, position in events:
+        if position is not None:
+            # a canvas event: Tk would have set the position on the canvas before the read
+            calendar.canvases[table[event].ix].user_bind_event = fake_gui.Bind_Event(*position)
+        calendar.handle_event(event, window)
+    return calendar, time.perf_counter() - start
+
+
+def main():
+    args = sys.argv[1:]
+    repeat = 1
+    if '--repeat' in args:
+        repeat = int(args[args.index('--repeat') + 1])
+        del args[args.index('--repeat'):args.index('--repeat') + 2]
+    as_json = '--json' in args
+    paths = [arg for arg in args if not arg.startswith('--')]
+
+    if paths:
+        header, events, footer = Event_Recorder.read(paths[0])
+    else:
+        header, events, footer = synthetic_session()
+
+    runs = [replay(header, events) for run in range(repeat)]
+    calendar, elapsed = min(runs, key=lambda run: run[1])
+    selected = [list(interval) for interval in calendar.get_selected_intervals()]
+    matches = None if footer is None else selected == footer['selected']
+
+    if as_json:
+        print(json.dumps({
+            'events': len(events),
+            'seconds': elapsed,
+            'events_per_second': len(events) / elapsed,
+            'kinds': calendar.get_event_stats(),
+            'selected_dates': calendar.count_selected_dates(),
+            'selected': selected,
+            'matches_recording': matches,
+        }, indent=1))
+        return
+
+    print('{:,} events in {:.3f}s: {:,.0f} events/s'.format(len(events), elapsed, len(events) / elapsed))
+    print()
+    print(calendar.event_stats.format_summary())
+    print()
+    print('final selection: {:,} dates in {:,} runs, view {:04}-{:02}'.format(
+        calendar.count_selected_dates(), len(selected), calendar.year, calendar.month))
+    for first, last in selected[:5]:
+        print('    {} .. {}'.format(first, last))
+    if len(selected) > 5:
+        print('    ...')
+    if matches is not None:
+        print('matches the recorded session: {}'.format('yes' if matches else 'NO'))
+
+
+if __name__ == '__main__':
+    main()
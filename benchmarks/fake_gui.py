@@ -0,0 +1,178 @@
+# in-memory stand-in for the parts of PySimpleGUI that ButtonCalendar uses, so the widget can
+# be built, driven and timed on a headless box. elements record their update() calls instead
+# of touching Tk, and windows read events from a scripted queue.
+#
+#     import fake_gui
+#     fake_gui.install() # before the first ButtonCalendar is built
+#
+# install() registers this module as 'PySimpleGUI'; button_calendar.load_gui() then picks it up.
+
+import sys
+from collections import deque
+
+WIN_CLOSED = None
+TIMEOUT_KEY = '__TIMEOUT__'
+
+
+# widget update() calls across all elements, see reset()
+updates = 0
+
+
+def install():
+    sys.modules['PySimpleGUI'] = sys.modules[__name__]
+
+
+def reset():
+    global updates
+    updates = 0
+
+
+# the current theme's name; theme(name) sets it, as in PySimpleGUI
+current_theme = 'DarkBlue3'
+
+
+def theme(name=None):
+    global current_theme
+    if name is not None:
+        current_theme = name
+    return current_theme
+
+
+def popup_get_file(*args, **kwargs):
+    return None
+
+
+class Element:
+    def __init__(self, *args, key=None, metadata=None, **kwargs):
+        self.key = self.Key = key
+        self.metadata = metadata
+        self.args = args
+        self.kwargs = kwargs
+        self.bindings = {}
+        self.user_bind_event = None
+        self.state = {}
+
+    def update(self, *args, **kwargs):
+        global updates
+        updates += 1
+        if args:
+            kwargs['value'] = args[0]
+        self.state.update(kwargs)
+
+    def bind(self, bind_string, key_modifier):
+        self.bindings[bind_string] = key_modifier
+
+    def unbind(self, bind_string):
+        self.bindings.pop(bind_string, None)
+
+    # elements nested in this one's layout
+    def children(self):
+        for arg in self.args + (self.kwargs.get('layout', ()),):
+            if isinstance(arg, (list, tuple)):
+                yield from walk(arg)
+
+
+class Button(Element):
+    pass
+
+
+class Text(Element):
+    pass
+
+
+class Column(Element):
+    pass
+
+
+class Frame(Element):
+    pass
+
+
+class Menu(Element):
+    pass
+
+
+# a bound event's position, as Tk reports it in Element.user_bind_event
+class Bind_Event:
+    def __init__(self, x, y):
+        self.x = x
+        self.y = y
+
+
+class Canvas:
+    def __init__(self):
+        self.items = {}
+
+    def itemconfig(self, figure, **options):
+        global updates
+        updates += 1
+        self.items[figure].update(options)
+
+
+class Graph(Element):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.TKCanvas = Canvas()
+
+    def add_figure(self, **options):
+        figure = len(self.TKCanvas.items) + 1
+        self.TKCanvas.items[figure] = options
+        return figure
+
+    def draw_rectangle(self, top_left, bottom_right, fill_color=None, line_color=None, line_width=None):
+        return self.add_figure(kind='rectangle', box=(top_left, bottom_right), fill=fill_color, outline=line_color)
+
+    def draw_text(self, text, location, color='black', font=None, **kwargs):
+        return self.add_figure(kind='text', text=text, location=location, fill=color)
+
+    def erase(self):
+        self.TKCanvas.items.clear()
+
+    # a bound event of this graph at canvas position (x, y), to queue on a Window
+    def event(self, key_modifier, x, y):
+        return (self, key_modifier, Bind_Event(x, y))
+
+
+def walk(layout):
+    for item in layout:
+        if isinstance(item, (list, tuple)):
+            yield from walk(item)
+        elif isinstance(item, Element):
+            yield item
+            yield from item.children()
+
+
+class Window:
+    def __init__(self, title='', layout=(), **kwargs):
+        self.title = title
+        self.closed = False
+        self.bindings = {}
+        # events returned by read(), in order. see read()
+        self.queue = deque()
+        self.elements = {}
+        for element in walk(layout):
+            if element.key is not None:
+                self.elements[element.key] = element
+
+    def __getitem__(self, key):
+        return self.elements[key]
+
+    def bind(self, bind_string, key):
+        self.bindings[bind_string] = key
+
+    # pops the next scripted event (a key, or a Graph.event()). once the queue is empty,
+    # a non-blocking read (timeout=0) times out and any other read closes the window
+    def read(self, timeout=None, timeout_key=TIMEOUT_KEY):
+        if self.queue:
+            event = self.queue.popleft()
+            if isinstance(event, tuple):
+                element, key_modifier, element.user_bind_event = event
+                event = element.key + key_modifier
+            return event, {}
+        if timeout == 0:
+            return timeout_key, {}
+        self.closed = True
+        return WIN_CLOSED, {}
+
+    def close(self):
+        self.closed = True
@@ -1,10 +1,33 @@
 # © 2021-2023 Jacob Branch
 # version 1.0.0
 
-import datetime
-import keyboard
-import mouse
-import PySimpleGUI as gui
+import contextlib
+import functools
+import time
+from collections import namedtuple
+from types import MappingProxyType
+from calendar_core import (
+    Date_Selection,
+    Event_Stats,
+    Heatmap,
+    Interval_Index,
+    Month_Grid,
+    Selection_File,
+    Today,
+    add_months,
+    day_names,
+    first_cell,
+    font,
+    get_palette,
+    month_grid,
+    month_name,
+    palette,
+    recurrence,
+    sunday_before_first,
+    to_date_string,
+    to_ordinal,
+    to_runs,
+)
 
 
 ### ButtonCalendar is a PySimpleGUI calendar widget with toggle buttons for each date.
@@ -12,95 +35,184 @@ import PySimpleGUI as gui
 
 
 
+# PySimpleGUI and the widget classes (calendar_widgets) are imported by load_gui() when the
+# first ButtonCalendar is built, so importing this module is fast and needs no display
+gui = None
+widgets = None
+
+def load_gui():
+    global gui, widgets
+    if gui is None:
+        import PySimpleGUI
+        import calendar_widgets
+        gui, widgets = PySimpleGUI, calendar_widgets
+    return gui
+
+
+# a class attribute naming one of calendar_widgets' classes, looked up on first access, so
+# ButtonCalendar.Date_Button etc. work before any calendar is built (loading the GUI then).
+# a subclass can assign its own class to the attribute; calendars build from type(self)
+class Widget_Class:
+    def __set_name__(self, owner, name):
+        self.name = name
+
+    def __get__(self, instance, owner):
+        load_gui()
+        return getattr(widgets, self.name)
+
+
+# a calendar event key, parsed once. 'kind' selects the handler, 'ix' is the Date_Button or
+# Week_Button index (or None), and 'modifiers' holds extra detail (e.g. the navigation action)
+Calendar_Event = namedtuple('Calendar_Event', ('kind', 'ix', 'modifiers'))
+
+# one user action's net change to a selection, passed to subscribers (see ButtonCalendar.subscribe()).
+# 'added' and 'removed' are sorted tuples of "YYYY-MM-DD" strings
+Selection_Change = namedtuple('Selection_Change', ('added', 'removed'))
+
+# everything refresh() needs to know about a view besides the selection: each panel's Month_Grid,
+# disabled flags, heatmap colors and event titles. prepared ahead of navigation, see ButtonCalendar.prefetch()
+View_State = namedtuple('View_State', ('grids', 'masks', 'heat', 'events'))
+
+
+# maps every event key the calendar reacts to onto its Calendar_Event, for a view of
+# 'panels' months whose element keys start with 'prefix'. keys missing from the table
+# belong to the host window (or another calendar) and are ignored
+@functools.lru_cache(maxsize=None)
+def event_table(panels=1, prefix=''):
+    # window-wide events, shared by every calendar in the window
+    table = {
+        gui.TIMEOUT_KEY: Calendar_Event('tick', None, ()),
+        'MouseWheel:Up': Calendar_Event('wheel', None, ('back_month',)),
+        'MouseWheel:Down': Calendar_Event('wheel', None, ('forward_month',)),
+    }
+    table[prefix + '-calendar-frame-_mouse_enter_'] = Calendar_Event('mouse_enter', None, ())
+    table[prefix + '-calendar-frame-_mouse_exit_'] = Calendar_Event('mouse_exit', None, ())
+    for action in ('back_year', 'back_month', 'forward_year', 'forward_month'):
+        table[prefix + action] = Calendar_Event('navigate', None, (action,))
+
+    for ix in range(42 * panels):
+        key = prefix + 'date_btn_' + str(ix)
+        table[key] = Calendar_Event('date_click', ix, ())
+        table[key + '_mouse_over_'] = Calendar_Event('date_hover', ix, ())
+        table[key + '_right_click_'] = Calendar_Event('date_right_click', ix, ())
+        table[key + '_control_right_click_'] = Calendar_Event('date_right_click', ix, ('control',))
+
+    for week in range(6 * panels):
+        table[prefix + 'week_select_' + str(week)] = Calendar_Event('week_click', week, ())
+
+    # the canvas backend's mouse events, per panel. the cell is found from the click position
+    for panel in range(panels):
+        key = prefix + 'date_canvas_' + str(panel)
+        table[key + '_click_'] = Calendar_Event('canvas_click', panel, ())
+        table[key + '_motion_'] = Calendar_Event('canvas_motion', panel, ())
+        table[key + '_right_click_'] = Calendar_Event('canvas_right_click', panel, ())
+        table[key + '_control_right_click_'] = Calendar_Event('canvas_right_click', panel, ('control',))
+
+    return MappingProxyType(table)
+
+
+# routes the events of a window holding several ButtonCalendars (each with its own key_prefix)
+# to the calendar that owns them with one dict lookup, instead of offering every event to every
+# calendar. mouse wheel events go to the calendar under the mouse, timeouts to all of them.
+# month grids and 'today' are cached process-wide (month_grid(), Today), so all routed
+# calendars share them
+class Calendar_Router:
+    def __init__(self, calendars=()):
+        self.calendars = []
+        self.routes = {} # event key -> (calendar, Calendar_Event)
+        self.hovered = None # calendar under the mouse
+        for calendar in calendars:
+            self.add(calendar)
+
+    def add(self, calendar):
+        for key, parsed in calendar.event_table.items():
+            if parsed.kind in Calendar_Router.window_kinds:
+                continue
+            if key in self.routes:
+                raise ValueError('event key ' + repr(key) + ' is used by two calendars, give them distinct key_prefix values')
+            self.routes[key] = (calendar, parsed)
+        self.calendars.append(calendar)
+
+    # call after the window is finalized or read, instead of each calendar's post_finalize()
+    def post_finalize(self, window):
+        for calendar in self.calendars:
+            calendar.post_finalize(window)
+
+    # returns the calendar that handled the event (None for foreign events)
+    def handle_event(self, event, window):
+        route = self.routes.get(event)
+        if route is not None:
+            calendar, parsed = route
+            calendar.handle_parsed(parsed)
+            if parsed.kind == 'mouse_enter':
+                self.hovered = calendar
+            elif parsed.kind == 'mouse_exit' and self.hovered is calendar:
+                self.hovered = None
+            return calendar
+
+        parsed = self.calendars[0].event_table.get(event) if self.calendars else None
+        if parsed is None:
+            return None
+        if parsed.kind == 'wheel':
+            if self.hovered is not None:
+                self.hovered.handle_parsed(parsed)
+            return self.hovered
+        for calendar in self.calendars:
+            calendar.handle_parsed(parsed)
+        return None
+
+    # kinds shared by the whole window rather than owned by one calendar
+    window_kinds = frozenset(('tick', 'wheel'))
+
+
 class ButtonCalendar:
-    gui.theme("LightBlue3")
-
-    # 'm' is ordinal number of month (i.e. JAN == 1, DEC == 12)    
-    month = lambda m: (
-        'JAN',
-        'FEB',
-        'MAR',
-        'APR',
-        'MAY',
-        'JUN',
-        'JUL',
-        'AUG',
-        'SEP',
-        'OCT',
-        'NOV',
-        'DEC',
-    )[m - 1] # 'm-1' is its index in this tuple
-
-    days = ('SUN',
-            'MON',
-            'TUE',
-            'WED',
-            'THU',
-            'FRI',
-            'SAT')
-
-    def font(style="label_small"):
-        fonts = {
-            "label": ("consolas bold", 8),
-            "label_small": ("consolas", 6),
-            "calendar_button": ("consolas bold", 10),
-        }
-        if style:
-            return fonts[style]
-        else:
-            return fonts
-        
-    def get_palette():
-        
-        black = "#FFFFFF"
-        white = "#000000"
-        med_grey = "#AAAAAA"
-        
-        navy = "#183440"
-        red_gold = "#f3c03f"
-        gold = "#F4E04D"
-        bright_gold = "#F9EE9F"
-        
-        colors = {
-            "default": navy,
-            "text_default": black,
-            
-            "selected": gold,
-            "text_selected": white,
-            
-            "off_month": med_grey,
-            
-            "range_select_anchor": red_gold,
-            "range_select_hover": bright_gold,
-        }
-        return colors
+    # 'm' is ordinal number of month (i.e. JAN == 1, DEC == 12)
+    month = month_name
+
+    days = day_names
+
+    font = font
+    get_palette = get_palette
+    palette = palette
+
+    Week_Button = Widget_Class()
+    Date_Button = Widget_Class()
+    Date_Canvas = Widget_Class()
+    Canvas_Cell = Widget_Class()
+
+    # PySimpleGUI theme of the calendar's own elements and window (a subclass may set its own).
+    # it is only applied while they are built (see themed()), so the host's theme is left as it was
+    theme = 'LightBlue3'
+
+    @contextlib.contextmanager
+    def themed(self):
+        previous = gui.theme()
+        gui.theme(self.theme)
+        try:
+            yield
+        finally:
+            gui.theme(previous)
 
-    palette = get_palette()
 
     def today():
-        return datetime.datetime.today().strftime("%Y-%m-%d")
+        return to_date_string(Today.ordinal())
 
     def parse(yyyy_mm_dd:str):
         return [int(date) for date in yyyy_mm_dd.split("-")]
 
-    def is_past(yyyy_mm_dd:str):
-        year, month, date = ButtonCalendar.parse(yyyy_mm_dd)
-        today_y, today_m, today_d = ButtonCalendar.parse(ButtonCalendar.today())
-        
-        past = False # assumption
-        if year < today_y or \
-           (year == today_y and month < today_m) or \
-           (year == today_y and month == today_m and date < today_d):
-
-            past = True
-
-        return past
+    # accepts "YYYY-MM-DD" or an ordinal
+    def is_past(yyyy_mm_dd):
+        if isinstance(yyyy_mm_dd, str):
+            yyyy_mm_dd = to_ordinal(yyyy_mm_dd)
+        return yyyy_mm_dd < Today.ordinal()
         
 
     def __init__(self,\
                  *args,
                  **kwargs):
         
+        load_gui()
+
         if not "yyyy_mm_dd" in list(kwargs.keys()):
             yyyy_mm_dd = ButtonCalendar.today()
         else:
@@ -110,6 +222,27 @@ class ButtonCalendar:
         hide_frame = False
         if 'hide_frame' in kwargs.keys():
             hide_frame = kwargs['hide_frame']
+
+        # prepended to every element key, so several calendars can share a window (see Calendar_Router)
+        self.key_prefix = ''
+        if 'key_prefix' in kwargs.keys():
+            self.key_prefix = kwargs['key_prefix']
+
+        # number of months shown side by side. the view is a fixed pool of 42 Date_Buttons
+        # (and 6 Week_Buttons) per month, built once and recycled on navigation
+        self.panels = 1
+        if 'months' in kwargs.keys():
+            self.panels = int(kwargs['months'])
+
+        # 'buttons': a Date_Button (Tk widget) per date. 'canvas': each month drawn on one
+        # Date_Canvas (a Graph), which builds and binds far fewer widgets
+        self.backend = 'buttons'
+        if 'backend' in kwargs.keys():
+            self.backend = kwargs['backend']
+        if self.backend not in ('buttons', 'canvas'):
+            raise ValueError('unknown backend: ' + repr(self.backend))
+        # cell index (in button_array) under the mouse in 'range select' mode, canvas backend only
+        self.canvas_hover = None
         
         self.year = int(self.year)
         self.month = int(self.month)
@@ -117,24 +250,106 @@ class ButtonCalendar:
         
         self.today = yyyy_mm_dd
         
+        # 'range select' mode's first and current end date (ordinals). dates rather than buttons,
+        # so a range can be started in one month and finished after navigating to another
         self.range_select_mode = False
         self.range_select_anchor = None
         self.range_select_extent = None
+
+        # wheel/month/year navigation is accumulated into a net month offset and applied with a
+        # single refresh by flush_navigation(). in a framed calendar this is opt-in, since the host's
+        # event loop has to read with a timeout (or call flush_navigation()) for it to be applied.
+        # None (not given): off in a framed calendar, on in one that opens its own window
+        self.coalesce_navigation = None
+        if 'coalesce_navigation' in kwargs.keys():
+            self.coalesce_navigation = kwargs['coalesce_navigation']
+        self.pending_months = 0
+        self.pending_since = None # time.monotonic() of the first queued navigation event
+
+        # indexes of the Date_Buttons currently painted as hovered in 'range select' mode
+        self.highlighted = frozenset()
         self.mouse_over = False
 
+        # Date_Button.render() tallies, see count_render()
+        self.updates_issued = 0
+        self.updates_skipped = 0
+        # widget updates issued by the most recent '_mouse_over_' event
+        self.hover_updates = 0
+
+        # per-event latency, update and selection size stats (an Event_Stats), off by default.
+        # pass instrument=True, or an Event_Stats(dump_interval=...) for periodic summaries
+        self.event_stats = None
+        if kwargs.get('instrument'):
+            instrument = kwargs['instrument']
+            self.event_stats = instrument if isinstance(instrument, Event_Stats) else Event_Stats()
+
+        # an Event_Recorder (or a path to record to) logging the events window() handles, for
+        # replay with benchmarks/bench_replay.py. off by default
+        self.recorder = None
+        if kwargs.get('record'):
+            from calendar_recorder import Event_Recorder
+            record = kwargs['record']
+            self.recorder = record if isinstance(record, Event_Recorder) else Event_Recorder(record)
+
         self.set_next_and_last_month()
 
-        self.date_list = self.build_date_list(self.year, self.month)
+        self.set_grids()
         self.button_array = []
-        self.selected_dates = []
+        self.event_table = event_table(self.panels, self.key_prefix)
+        self.selected_dates = Date_Selection()
+        self.exports = {}
+        self.exports_version = None
+
+        # callbacks(calendar, Selection_Change), see subscribe()
+        self.subscribers = []
+        # > 0 while a batch_changes() block is open
+        self.batch_depth = 0
+        # (added, removed) ordinals not yet written to self.selection_file
+        self.unsaved = (set(), set())
+
+        # where _save_ writes the selection (see save()). an existing file is loaded on startup
+        self.selection_file = None
+        if kwargs.get('save_path'):
+            self.load(kwargs['save_path'])
+
+        # today's ordinal as of the last render, to catch midnight rollover
+        self.rendered_today = Today.ordinal()
+
+        # Interval_Indexes of dates to disable ('blackout') or to keep enabled ('availability',
+        # None == every date). past dates are always disabled. see set_blackout()
+        self.blackout = None
+        self.availability = None
+        if kwargs.get('blackout') is not None:
+            self.blackout = self.to_interval_index(kwargs['blackout'])
+        if kwargs.get('availability') is not None:
+            self.availability = self.to_interval_index(kwargs['availability'])
+
+        # Heatmap coloring unselected dates by a per-day metric, or None. see set_heatmap()
+        self.heatmap = kwargs.get('heatmap')
+
+        # holidays/appointments marked on the grid: an event provider (see calendar_events), or None
+        self.events = kwargs.get('events')
+
+        # View_States of the current and neighbouring views, by (year, month), computed during
+        # idle time (see prefetch()). they are valid for one prefetch_key()
+        self.prefetched = {}
+        self.prefetched_key = None
+        self.prefetch_done = False # nothing left to prefetch around the current view
+        self.prefetch_hits = 0
+        self.prefetch_misses = 0
 
         self.top_button_text = self.refresh_top_buttons()
 
+        with self.themed():
+            self.build_elements(hide_frame)
+
+    # the header, the date cell pool and the frame holding them
+    def build_elements(self, hide_frame):
         ## build buttons
 
         self.back_year_btn = gui.Button(
             self.top_button_text['back_y'],
-            key='back_year',
+            key=self.key_prefix + 'back_year',
             size=(6, 1),
             font=ButtonCalendar.font('label'),
             button_color=(
@@ -144,7 +359,7 @@ class ButtonCalendar:
         )
         self.back_month_btn = gui.Button(
             self.top_button_text['back_m'],
-            key='back_month',
+            key=self.key_prefix + 'back_month',
             size=(4, 1),
             font=ButtonCalendar.font('label'),
             button_color=(
@@ -157,7 +372,7 @@ class ButtonCalendar:
         )
         self.forward_month_btn = gui.Button(
             self.top_button_text['forward_m'],
-            key='forward_month',
+            key=self.key_prefix + 'forward_month',
             size=(4, 1),
             font=ButtonCalendar.font('label'),
             button_color=(
@@ -167,7 +382,7 @@ class ButtonCalendar:
         )
         self.forward_year_btn = gui.Button(
             self.top_button_text['forward_y'],
-            key='forward_year',
+            key=self.key_prefix + 'forward_year',
             size=(6, 1),
             font=ButtonCalendar.font('label'),
             button_color=(
@@ -176,43 +391,31 @@ class ButtonCalendar:
             ),
         )
 
-        column_layout_array = []
-        for d in ButtonCalendar.days:
-            column_layout_array.append([[gui.Text(d, font=ButtonCalendar.font('label'))]])
-
-        ## build date button array
-        for ix, date in enumerate(self.date_list):
-
-            btn = ButtonCalendar.Date_Button(date, self.month, ix, False)
+        ## build the Date_Button pool, one 6-week block per month
+        self.canvases = []
+        if self.backend == 'canvas':
+            self.canvases = [type(self).Date_Canvas(panel, self.key_prefix) for panel in range(self.panels)]
+
+        state = self.view_state(self.year, self.month)
+        for ix in range(42 * self.panels):
+            grid = self.grids[ix // 42]
+            panel, cell_ix = divmod(ix, 42)
+            cell = (
+                grid, ix, grid.ordinals[cell_ix] in self.selected_dates, self.key_prefix,
+                state.masks[panel][cell_ix], state.heat[panel][cell_ix], state.events[panel][cell_ix],
+            )
+            if self.canvases:
+                btn = type(self).Canvas_Cell(self.canvases[ix // 42], *cell)
+            else:
+                btn = type(self).Date_Button(*cell)
             self.button_array.append(btn)
 
-            ix = self.date_list.index(date) % 7
-            column_layout_array[ix].append([btn])
-
         ## arrange all buttons into a frame
 
+        self.panel_labels = []
         frame_layout = [[]]
-        for col in column_layout_array:
-            new_column = gui.Column(
-                col,
-                element_justification='center',
-                pad=(0, 0),
-                vertical_alignment='top',
-            )
-            frame_layout[0].append(new_column)
-
-        add_week_layout = [[gui.Text('WEEK', font=ButtonCalendar.font('label'))]]
-        for week in range(6):
-            btn = ButtonCalendar.Week_Button(week)
-            add_week_layout.append([btn])
-        add_week_column = gui.Column(
-            add_week_layout,
-            element_justification='center',
-            pad=(2, 0),
-            vertical_alignment='top',
-        )
-
-        frame_layout[0].append(add_week_column)
+        for panel in range(self.panels):
+            frame_layout[0].extend(self.build_panel(panel))
 
         spacer_frame = gui.Frame(
             '', frame_layout, pad=(5, 0), relief='flat', vertical_alignment='top'
@@ -238,13 +441,68 @@ class ButtonCalendar:
             self.layout,
             font=ButtonCalendar.font('label'),
             element_justification='center',
-            key= '-calendar-frame-',
+            key= self.key_prefix + '-calendar-frame-',
             border_width= int(not hide_frame),
         )
+
+    # layout columns (7 days + week) for one month of the view. multi-month views
+    # label each month above its days
+    def build_panel(self, panel):
+        if self.canvases:
+            panel_layout = [self.canvases[panel]]
+        else:
+            panel_layout = self.build_button_panel(panel)
+
+        if self.panels == 1:
+            return panel_layout
+
+        label = gui.Text(self.panel_label(panel), font=ButtonCalendar.font('calendar_button'))
+        self.panel_labels.append(label)
+        return [gui.Column([[label], panel_layout], element_justification='center', vertical_alignment='top')]
+
+    # the Date_Button backend's panel: a column per day of Date_Buttons, and a column of Week_Buttons
+    def build_button_panel(self, panel):
+        column_layout_array = []
+        for d in ButtonCalendar.days:
+            column_layout_array.append([[gui.Text(d, font=ButtonCalendar.font('label'))]])
+
+        for ix in range(42 * panel, 42 * panel + 42):
+            column_layout_array[ix % 7].append([self.button_array[ix]])
+
+        panel_layout = []
+        for col in column_layout_array:
+            new_column = gui.Column(
+                col,
+                element_justification='center',
+                pad=(0, 0),
+                vertical_alignment='top',
+            )
+            panel_layout.append(new_column)
+
+        add_week_layout = [[gui.Text('WEEK', font=ButtonCalendar.font('label'))]]
+        for week in range(6 * panel, 6 * panel + 6):
+            btn = type(self).Week_Button(week, self.key_prefix)
+            add_week_layout.append([btn])
+        add_week_column = gui.Column(
+            add_week_layout,
+            element_justification='center',
+            pad=(2, 0),
+            vertical_alignment='top',
+        )
+
+        panel_layout.append(add_week_column)
+        return panel_layout
+
+    def panel_label(self, panel):
+        grid = self.grids[panel]
+        return ButtonCalendar.month(grid.month) + '/' + str(grid.year)
         
         
-    # call after parent window is finalized or read
-    def post_finalize(self):
+    # call after parent window is finalized or read.
+    # a framed calendar is given the window it was added to
+    def post_finalize(self, window=None):
+        if window is not None:
+            self.window = window
         self.bind_mouse_over()
         self.bind_right_click_to_all_date_btns()
         self.select_today()
@@ -252,66 +510,213 @@ class ButtonCalendar:
         self.window.bind("<Control-p>", '_print_')
         self.window.bind("<Control-P>", '_print_')
 
-    def window(self):
-
-        exit_events = (gui.WIN_CLOSED, 'Exit', 'Escape:27', 'F5:116')
-
-        event_is_type = lambda event, event_type: str(event_type) in event.split("::")
-
+    # build and finalize the self-windowed calendar (menu + frame). used by window(),
+    # and by calendar_async for hosts that drive the window themselves
+    def open_window(self):
 
         menu_def = [
             ['&Tools', ['&Print::_print_', '&Save::_save_', '---', '&Preferences::_preferences_', 'E&xit']],
 
             ]
 
-        self.menu = gui.Menu(menu_def)
+        with self.themed():
+            self.menu = gui.Menu(menu_def)
 
-        lyt = [
-            [self.menu],
-            [self.frame],
-            ],
+            lyt = [
+                [self.menu],
+                [self.frame],
+                ],
 
-        self.window = window = gui.Window(
-            'Button Calendar',
-            layout= lyt,
-            return_keyboard_events=True,
-            finalize= True,
-        )
+            self.window = window = gui.Window(
+                'Button Calendar',
+                layout= lyt,
+                return_keyboard_events=True,
+                finalize= True,
+            )
         
         self.post_finalize()
+        if self.coalesce_navigation is None:
+            self.coalesce_navigation = True
+        return window
+
+    def window(self):
+
+        window = self.open_window()
+        if self.recorder is not None:
+            self.recorder.open(self.recording_header())
 
         ## BEGIN EVENT LOOP ##
         while True:
-            event, values = window.read()
-            print('Event: ', event)
-
+            # wake up at midnight (timeout event) so yesterday gets disabled.
+            # while navigation is pending, drain the queue without blocking: the timeout
+            # event once it is empty applies the net month offset
+            # until the neighbouring months are prefetched, time out after a short idle period
+            if self.pending_since is not None:
+                timeout = 0
+            elif not self.prefetch_done:
+                timeout = min(ButtonCalendar.idle_timeout, Today.ms_until_midnight())
+            else:
+                timeout = Today.ms_until_midnight()
+            event, values = window.read(timeout=timeout)
 
             # exit app
-            if event in exit_events: break
-
+            if ButtonCalendar.is_exit_event(event): break
 
-            if event_is_type(event, "_print_"):
-                print(self)
+            if self.handle_menu_event(event):
                 continue # skip self.handle_event()
 
+            if self.recorder is not None:
+                self.record_event(event)
             self.handle_event(event, window)
 
 ##            print('Selected Dates: ', self.get_selected_dates())
         window.close()
+        if self.recorder is not None:
+            self.recorder.close({'selected': self.get_selected_intervals()})
         ## END EVENT LOOP ##
         return self.get_selected_dates()
 
-    # export copy of self.selected_dates
+    def is_exit_event(event):
+        return event in (gui.WIN_CLOSED, 'Exit', 'Escape:27', 'F5:116')
+
+    # Tools menu / ctrl-P of the self-windowed calendar. returns True if 'event' was one of them
+    def handle_menu_event(self, event):
+
+        event_is_type = lambda event, event_type: str(event_type) in str(event).split("::")
+
+        if event_is_type(event, "_print_"):
+            print(self)
+            return True
+
+        if event_is_type(event, "_save_"):
+            if self.selection_file is None:
+                self.choose_save_path()
+            self.save()
+            return True
+
+        if event_is_type(event, "_preferences_"):
+            self.choose_save_path()
+            return True
+
+        return False
+
+    # export copy of self.selected_dates (sorted).
+    # the tuple is cached until the selection changes, so polling it is cheap
     def get_selected_dates(self):
-        return tuple(self.selected_dates)
+        return self.export('dates', lambda: tuple(map(to_date_string, self.selected_dates)))
+
+    # stream the selected dates (sorted) without building a tuple
+    def iter_selected_dates(self):
+        return map(to_date_string, self.selected_dates)
+
+    def count_selected_dates(self):
+        return len(self.selected_dates)
+
+    # the selection as sorted runs of consecutive dates: (("YYYY-MM-DD", "YYYY-MM-DD"), ...),
+    # both ends inclusive. cached like get_selected_dates()
+    def get_selected_intervals(self):
+        return self.export('intervals', lambda: tuple(
+            (to_date_string(first), to_date_string(last)) for first, last in to_runs(self.selected_dates)
+        ))
+
+    # cache of exported views of the selection, rebuilt when Date_Selection.version moves on
+    def export(self, name, build):
+        version = (self.selected_dates, self.selected_dates.version)
+        if self.exports_version != version:
+            self.exports = {}
+            self.exports_version = version
+        if name not in self.exports:
+            self.exports[name] = build()
+        return self.exports[name]
+
+    # write the selection to 'path' (default: the file last saved to or loaded from).
+    # saving again to the same file only appends the changes made since
+    def save(self, path=None):
+        if path is not None and (self.selection_file is None or self.selection_file.path != path):
+            self.selection_file = Selection_File(path)
+        if self.selection_file is None:
+            return None
+        self.publish_changes()
+        self.selection_file.save(self.selected_dates, self.unsaved)
+        self.unsaved = (set(), set())
+        return self.selection_file.path
+
+    # replace the selection with the one saved at 'path' (default: the file last saved to or
+    # loaded from). returns the path, or None (changing nothing) if there is no file yet
+    def load(self, path=None):
+        if path is not None:
+            self.selection_file = Selection_File(path)
+        if self.selection_file is None:
+            return None
+        selected = self.selection_file.load()
+        # applied as a diff, so subscribers see one batch for the whole load
+        with self.batch_changes():
+            self.selected_dates.difference_update(set(self.selected_dates) - selected)
+            self.selected_dates.update(selected)
+            if self.button_array:
+                self.repaint_selection()
+        self.unsaved = (set(), set()) # already on disk
+        return self.selection_file.path
+
+    # call 'callback(calendar, change)' with a Selection_Change after every action that changes
+    # the selection: a click, a range or week toggle, select_dates(), load(). returns 'callback'
+    def subscribe(self, callback):
+        self.subscribers.append(callback)
+        return callback
+
+    def unsubscribe(self, callback):
+        self.subscribers.remove(callback)
+
+    # group selection changes into one Selection_Change, published when the outermost block exits
+    @contextlib.contextmanager
+    def batch_changes(self):
+        self.batch_depth += 1
+        try:
+            yield
+        finally:
+            self.batch_depth -= 1
+        if not self.batch_depth:
+            self.publish_changes()
+
+    # hand the selection's changes since the last call to the subscribers, and keep them for save()
+    def publish_changes(self):
+        added, removed = self.selected_dates.pop_changes()
+        if not (added or removed):
+            return
+
+        unsaved_added, unsaved_removed = self.unsaved
+        unsaved_added -= removed
+        unsaved_added |= added
+        unsaved_removed -= added
+        unsaved_removed |= removed
+
+        if self.subscribers:
+            change = Selection_Change(
+                tuple(map(to_date_string, sorted(added))),
+                tuple(map(to_date_string, sorted(removed))),
+            )
+            for callback in tuple(self.subscribers):
+                callback(self, change)
+
+    # ask where _save_ should write to
+    def choose_save_path(self):
+        path = gui.popup_get_file(
+            'Save selected dates to:',
+            save_as=True,
+            default_extension='.bcal',
+            file_types=(('ButtonCalendar selection', '*.bcal'),),
+        )
+        if path:
+            self.selection_file = Selection_File(path)
 
     # get a framed ButtonCalendar for use in another window
     def get_frame(self):
-        del ButtonCalendar.window # disable window launcher
+        if 'window' in ButtonCalendar.__dict__:
+            del ButtonCalendar.window # disable window launcher
         return self.frame
 
     def __str__(self):
-        return str(self.get_selected_dates())
+        return self.export('str', lambda: str(self.get_selected_dates()))
 
     # ensures that certain actions (e.g. mouse wheel scroll) only affect calendar the when mouse is over the frame 
     def bind_mouse_over(self):
@@ -319,137 +724,349 @@ class ButtonCalendar:
         self.frame.bind('<Leave>', '_mouse_exit_')
 
     # right click a date button to enter 'range select' mode
+    # (the canvas backend draws its canvases and binds their clicks instead)
     def bind_right_click_to_all_date_btns(self):
+        if self.canvases:
+            self.bind_canvases()
+            return
         for btn in self.button_array:
             btn.bind('<Button-3>', '_right_click_')
             btn.bind('<Shift-Button-3>', '_control_right_click_')
             btn.bind('<Control-Button-3>', '_control_right_click_')
+
+    def bind_canvases(self):
+        for canvas in self.canvases:
+            canvas.draw_grid()
+            canvas.bind('<ButtonRelease-1>', '_click_')
+            canvas.bind('<Button-3>', '_right_click_')
+            canvas.bind('<Shift-Button-3>', '_control_right_click_')
+            canvas.bind('<Control-Button-3>', '_control_right_click_')
     
     # buttons can react to mouse hover when called. used when in 'range select' mode
     def bind_hover_to_all_date_btns(self):
+        for canvas in self.canvases:
+            canvas.bind('<Motion>', '_motion_')
         for btn in self.button_array:
             btn.bind('<Enter>', '_mouse_over_')
             
     # buttons can no longer react to mouse hover after called. used when exiting 'range select' mode
     def unbind_hover_from_all_date_btns(self):
+        self.canvas_hover = None
+        for canvas in self.canvases:
+            canvas.unbind('<Motion>')
         for btn in self.button_array:
             btn.unbind('<Enter>')
 
     # window-agnostic** handler for all events
     # **(i.e. it should be able to handle any events that originate inside or outside of the widget)
+    # keys are parsed once into a Calendar_Event via self.event_table, so events that
+    # don't belong to the calendar are rejected with a single dict lookup
     def handle_event(self, event, window):
+        return self.handle_parsed(self.event_table.get(event))
 
-        ## EVENT PARSING ##
-
-        # toggle "mouse-over" events
-        if event == '-calendar-frame-_mouse_enter_':
-            self.mouse_over = True
-        elif event == '-calendar-frame-_mouse_exit_':
-            self.mouse_over = False
-      
-        # interpret mouse wheel as +/- month
-        if event == 'MouseWheel:Up' and self.mouse_over == True:
-            event = 'back_month'
-        if event == 'MouseWheel:Down' and self.mouse_over == True:
-            event = 'forward_month'
-
-        ## EVENT HANDLING ##
-        
-        # if back/forward month/year buttons are pressed, update month and year
-        if event in ['back_year', 'back_month', 'forward_year', 'forward_month']:
-            self.refresh(event)
-        # Date_Button() clicked (left click only)
-        if event.startswith('date_btn_') and not event.endswith('_'):
-            # if in 'range select mode', use left-click to select range
-            if self.range_select_mode == True:
-                self.select_range(window, select= True)
-            # if not in 'range select mode', use left-click to select individual date
-            else:
-                btn = window[event]
-                self.toggle_date_button(btn, not btn.metadata['selected'])
-            
-        # Date_Button() mouse over
-        if self.range_select_mode == True and event.startswith('date_btn_') and event.endswith('_mouse_over_'):
-            
-            btn_name = event.replace('_mouse_over_', '')
-            btn = window[btn_name]
-            self.range_select_extent = btn.ix
+    # handle an event already parsed by self.event_table (or None for a foreign event)
+    def handle_parsed(self, parsed):
+        if self.event_stats is not None:
+            return self.handle_timed_event(parsed)
+        if parsed is None:
+            return self
 
-            selection_range = self.get_selection_range()
-            
-            for btn in self.button_array:
-                btn.update(
-                    button_color=btn.get_button_color(
-                        selected=btn.metadata['selected'],
-                        is_range_select_anchor= btn.ix == self.range_select_anchor
-                    )
-                )
-            
-            for btn_ix in range(selection_range[0], selection_range[1]):
-                btn = window['date_btn_'+str(btn_ix)]
-                btn.on_range_select_mouse_over(self)
-            
-            
-        # Date_Button() clicked (right click only)
-        if event.startswith('date_btn_') and event.endswith('_right_click_'):
-
-            event_is_ctrl_click = event.endswith('_control_right_click_')
-
-            btn_key = event.replace('_right_click_', '')
-            btn_key = btn_key.replace('_control', '')
+        self.dispatch(parsed)
+        return self
 
-            btn = window[btn_key]
-            self.range_select_extent = btn.ix
-            
-            # not already in 'range_select_mode'
-            if self.range_select_mode == False:
-                self.bind_hover_to_all_date_btns()
-                btn.set_to_range_select_anchor(self)
-                self.range_select_mode = True
-                
-            else:
-                self.select_range(window, select= not event_is_ctrl_click)
+    # handle_event() with instrumentation on. foreign events are recorded as 'foreign'
+    def handle_timed_event(self, parsed):
+        issued = self.updates_issued
+        start = time.perf_counter()
+        if parsed is not None:
+            self.dispatch(parsed)
+        self.event_stats.record(
+            'foreign' if parsed is None else parsed.kind,
+            time.perf_counter() - start,
+            self.updates_issued - issued,
+            len(self.selected_dates),
+        )
+        return self
 
-        # Week_Button() clicked
-        if event.startswith('week_select_'):
-            btn = window[event]
-            dates = btn.metadata['date_range']
-            self.toggle_week_button(dates)
+    # what a replay needs to rebuild this calendar as it is now (see Event_Recorder). the view
+    # is recorded as the first of its month, which exists whatever day the calendar opened on
+    def recording_header(self):
+        return {
+            'yyyy_mm_dd': '{:04}-{:02}-01'.format(self.year, self.month),
+            'months': self.panels,
+            'backend': self.backend,
+            'key_prefix': self.key_prefix,
+            'coalesce_navigation': self.coalesce_navigation,
+            'today': to_date_string(Today.ordinal()),
+            'selected': self.get_selected_intervals(),
+        }
 
+    # log 'event' to self.recorder. canvas mouse events also log the pointer position, since
+    # their key doesn't say which cell they hit
+    def record_event(self, event):
+        position = None
+        parsed = self.event_table.get(event)
+        if parsed is not None and parsed.kind.startswith('canvas_'):
+            bind_event = self.canvases[parsed.ix].user_bind_event
+            position = (bind_event.x, bind_event.y)
+        self.recorder.record(event, position)
+
+    # summary of the instrumentation (see Event_Stats.summary()), or None if it is off
+    def get_event_stats(self):
+        if self.event_stats is None:
+            return None
+        return self.event_stats.summary()
+
+    def dispatch(self, parsed):
+        # re-render if midnight has passed since the last refresh
+        if Today.ordinal() != self.rendered_today:
+            self.refresh(None)
+
+        # apply queued navigation before anything that reads or paints the grid
+        if self.pending_since is not None and parsed.kind not in ButtonCalendar.navigation_kinds:
+            self.flush_navigation()
+
+        ButtonCalendar.event_handlers[parsed.kind](self, parsed)
+
+    ## EVENT HANDLERS ## (see event_handlers, below)
+
+    # the event queue went idle (or midnight passed, see dispatch()): prefetch the neighbouring months
+    def on_tick(self, parsed):
+        if not self.prefetch_done:
+            self.prefetch()
+
+    # toggle "mouse-over" events
+    def on_mouse_enter(self, parsed):
+        self.mouse_over = True
+
+    def on_mouse_exit(self, parsed):
+        self.mouse_over = False
 
-        return self
+    # interpret mouse wheel as +/- month
+    def on_wheel(self, parsed):
+        if self.mouse_over == True:
+            self.queue_navigation(ButtonCalendar.navigation_months[parsed.modifiers[0]])
+
+    # if back/forward month/year buttons are pressed, update month and year
+    def on_navigate(self, parsed):
+        self.queue_navigation(ButtonCalendar.navigation_months[parsed.modifiers[0]])
+
+    # add to the pending month offset. applied right away unless navigation is coalesced,
+    # or if the pending offset has waited longer than one frame (frame_interval)
+    def queue_navigation(self, months):
+        self.pending_months += months
+        now = time.monotonic()
+        if self.pending_since is None:
+            self.pending_since = now
+        if not self.coalesce_navigation or now - self.pending_since >= ButtonCalendar.frame_interval:
+            self.flush_navigation()
+
+    # apply all queued navigation with one refresh
+    def flush_navigation(self):
+        if self.pending_since is None:
+            return
+        months = self.pending_months
+        self.pending_months = 0
+        self.pending_since = None
+        if months:
+            self.year, self.month = add_months(self.year, self.month, months)
+            self.refresh(None)
+
+    # Date_Button() clicked (left click only)
+    def on_date_click(self, parsed):
+        # if in 'range select mode', use left-click to select range
+        if self.range_select_mode == True:
+            self.range_select_extent = self.button_array[parsed.ix].metadata.ordinal
+            self.select_range(None, select= True)
+        # if not in 'range select mode', use left-click to select individual date
+        else:
+            btn = self.button_array[parsed.ix]
+            # ignore clicks that raced a midnight rollover
+            if not btn.rendered[2]:
+                self.toggle_date_button(btn, not btn.metadata.selected)
+
+    # Date_Button() mouse over
+    def on_date_hover(self, parsed):
+        if self.range_select_mode == True:
+            self.range_select_extent = self.button_array[parsed.ix].metadata.ordinal
+
+            issued = self.updates_issued
+            self.set_highlight(self.buttons_between(*self.get_selection_range()))
+            self.hover_updates = self.updates_issued - issued
+
+    # Date_Button() clicked (right click only)
+    def on_date_right_click(self, parsed):
+        btn = self.button_array[parsed.ix]
+        self.range_select_extent = btn.metadata.ordinal
+
+        # not already in 'range_select_mode'
+        if self.range_select_mode == False:
+            self.bind_hover_to_all_date_btns()
+            self.count_render(btn.set_to_range_select_anchor(self))
+            self.range_select_mode = True
 
+        else:
+            self.select_range(None, select= 'control' not in parsed.modifiers)
+
+    # Week_Button() clicked
+    def on_week_click(self, parsed):
+        self.toggle_week_button((7 * parsed.ix, 7 * parsed.ix + 7))
+
+    # Date_Canvas clicked, right-clicked or (in 'range select' mode) hovered. the cell under the
+    # mouse is computed from the event position and handled as the equivalent Date_Button /
+    # Week_Button event, so both backends behave the same
+    def on_canvas_event(self, parsed):
+        canvas = self.canvases[parsed.ix]
+        position = canvas.user_bind_event
+        hit = canvas.hit(position.x, position.y)
+        if hit is None:
+            return
+        kind = ButtonCalendar.canvas_kinds.get((parsed.kind, hit[0]))
+        if kind is None:
+            return
+
+        if hit[0] == 'week':
+            ix = 6 * parsed.ix + hit[1]
+        else:
+            ix = 42 * parsed.ix + hit[1]
+            # a disabled Date_Button never sends its click, so neither does a disabled cell
+            if kind == 'date_click' and self.button_array[ix].rendered[2]:
+                return
+            if kind == 'date_hover':
+                # motion events fire per pixel; a Date_Button only reports entering it
+                if ix == self.canvas_hover:
+                    return
+                self.canvas_hover = ix
+
+        ButtonCalendar.event_handlers[kind](self, Calendar_Event(kind, ix, parsed.modifiers))
+
+    # apply 'range select' mode's span (anchor to extent, which may be in different months) as
+    # interval operations on the selection, skipping past, blacked out and unavailable dates
+    # like single clicks do. 'window' is unused; kept for backwards compatibility
     def select_range(self, window, select= True):
-        selection_range = self.get_selection_range()
-        for btn_ix in range(selection_range[0], selection_range[1]):
-            btn = window['date_btn_'+str(btn_ix)]
-            self.toggle_date_button(btn, select)
+        first, last = self.get_selection_range()
+        # every run is an interval operation on the store; the pool is repainted once after
+        update = self.selected_dates.update_range if select else self.selected_dates.difference_update_range
+        with self.batch_changes():
+            for run in self.enabled_intervals(first, last):
+                update(*run)
+            self.repaint_selection()
+
+        # restore the hovered buttons (and the anchor, which may be off the hovered span)
+        anchor = self.range_select_anchor
+        self.range_select_anchor = None
+        self.set_highlight(())
+        for btn in self.buttons_for(anchor):
+            self.count_render(btn.render(button_color=btn.get_button_color(selected=btn.metadata.selected)))
         self.unbind_hover_from_all_date_btns()
         self.range_select_mode = False
 
+    # select (or deselect) every date from 'first' to 'last' (inclusive, "YYYY-MM-DD" strings or
+    # ordinals) with one interval operation, however long the span
+    def select_interval(self, first, last, select=True):
+        if isinstance(first, str):
+            first = to_ordinal(first)
+        if isinstance(last, str):
+            last = to_ordinal(last)
+        if last < first:
+            return
+        with self.batch_changes():
+            if select:
+                self.selected_dates.update_range(first, last)
+            else:
+                self.selected_dates.difference_update_range(first, last)
+            self.repaint_selection()
+
+    # (first, last) runs of the dates from 'first' to 'last' that aren't past, blacked out or unavailable
+    def enabled_intervals(self, first, last):
+        runs = [(max(first, self.rendered_today), last)]
+        if self.availability is not None:
+            runs = [run for span in runs for run in self.availability.overlapping(*span)]
+        if self.blackout is not None:
+            runs = [run for span in runs for run in self.blackout.gaps(*span)]
+        return [(first, last) for first, last in runs if first <= last]
+
+    # paint the Date_Buttons with indexes in 'span' as hovered. only buttons entering or leaving
+    # the previously highlighted set (the symmetric difference) are repainted
+    def set_highlight(self, span):
+        old = self.highlighted
+        new = frozenset(span)
+        self.highlighted = new
+
+        for btn_ix in old - new:
+            btn = self.button_array[btn_ix]
+            self.count_render(btn.render(
+                button_color=btn.get_button_color(
+                    selected=btn.metadata.selected,
+                    is_range_select_anchor= btn.metadata.ordinal == self.range_select_anchor
+                )
+            ))
+
+        for btn_ix in new - old:
+            self.count_render(self.button_array[btn_ix].on_range_select_mouse_over(self))
+
+    # (first, last) ordinals of the 'range select' span, in order
     def get_selection_range(self):
         selection_range = [self.range_select_anchor, self.range_select_extent]
         selection_range.sort()
-        selection_range = (selection_range[0], selection_range[1]+1)
-        return selection_range
+        return tuple(selection_range)
+
+    # indexes of the visible Date_Buttons showing dates from 'first' to 'last' (inclusive)
+    def buttons_between(self, first, last):
+        indexes = []
+        for panel, grid in enumerate(self.grids):
+            start = grid.ordinals[0]
+            lo = max(first - start, 0)
+            hi = min(last - start + 1, 42)
+            indexes.extend(range(42 * panel + lo, 42 * panel + hi))
+        return indexes
+
+    # month offset of each navigation action
+    navigation_months = {
+        'back_year': -12,
+        'back_month': -1,
+        'forward_month': 1,
+        'forward_year': 12,
+    }
+    navigation_kinds = frozenset(('wheel', 'navigate', 'mouse_enter', 'mouse_exit'))
+    # longest a queued navigation waits for the queue to go idle (seconds)
+    frame_interval = 1 / 30
+
+    # views prepared by prefetch(), as month offsets from the current one, most likely first
+    prefetch_offsets = (1, -1, 12, -12)
+    # how long window() waits for events before prefetching (ms)
+    idle_timeout = 50
+
+    # (canvas event kind, part of the canvas hit) -> equivalent Calendar_Event kind
+    canvas_kinds = {
+        ('canvas_click', 'date'): 'date_click',
+        ('canvas_click', 'week'): 'week_click',
+        ('canvas_right_click', 'date'): 'date_right_click',
+        ('canvas_motion', 'date'): 'date_hover',
+    }
+
+    # Calendar_Event.kind -> handler
+    event_handlers = {
+        'tick': on_tick,
+        'mouse_enter': on_mouse_enter,
+        'mouse_exit': on_mouse_exit,
+        'wheel': on_wheel,
+        'navigate': on_navigate,
+        'date_click': on_date_click,
+        'date_hover': on_date_hover,
+        'date_right_click': on_date_right_click,
+        'week_click': on_week_click,
+        'canvas_click': on_canvas_event,
+        'canvas_motion': on_canvas_event,
+        'canvas_right_click': on_canvas_event,
+    }
 
     # auto-selects today's date_button. called after window is initiated, but before first .read() call
     def select_today(self):
         self.toggle_date_button(self.get_button(self.today), True)
 
     def sunday_before_first(self, year, month):
-
-        first = datetime.datetime(year, month, 1)
-        # get day of week from 'first' SUN=1 SAT=7
-        dow = int(first.strftime('%w')) + 1
-
-        # roll back one extra week if month starts on a Sunday
-        if dow == 1:
-            dow = 8
-
-        #'last sunday' is 'first' minus the numerical day of week
-        first_sun = first - datetime.timedelta(days=dow)
-        return first_sun
+        return sunday_before_first(year, month)
 
     def get_new_month_and_year(self, event):
 
@@ -477,11 +1094,18 @@ class ButtonCalendar:
 
     def refresh_top_buttons(self):
         month = ButtonCalendar.month
+        # in a multi-month view, 'forward' brings in the month after the last one shown
+        last_y, last_m = add_months(self.year, self.month, self.panels - 1)
+        next_m = add_months(last_y, last_m, 1)[1]
+        m_and_y = month(self.month) + '/' + str(self.year)
+        if self.panels > 1:
+            m_and_y += ' - ' + month(last_m) + '/' + str(last_y)
+
         btn_text = {
             'back_y': '<<' + str(self.year - 1),
             'back_m': '<' + str(month(self.last_month)),
-            'm_and_y': month(self.month) + '/' + str(self.year),
-            'forward_m': str(month(self.next_month)) + '>',
+            'm_and_y': m_and_y,
+            'forward_m': str(month(next_m)) + '>',
             'forward_y': str(self.year + 1) + '>>',
         }
 
@@ -495,44 +1119,74 @@ class ButtonCalendar:
         self.month_and_year.update(btn_text['m_and_y'])
         self.forward_month_btn.update(btn_text['forward_m'])
         self.forward_year_btn.update(btn_text['forward_y'])
+        for panel, label in enumerate(self.panel_labels):
+            label.update(self.panel_label(panel))
+        self.updates_issued += 5 + len(self.panel_labels)
 
+    # also repaints the date's twin in a neighbouring month of a multi-month view
     def toggle_date_button(self, button, select):
-        date = button.metadata['date']
+        date = button.metadata.ordinal
+        for btn in self.buttons_for(date):
+            self.count_render(btn.select() if select else btn.deselect())
         if select:
-            button.select()
-            self.selected_dates.append(date)
-            # remove duplicates
-            self.selected_dates = list(set(self.selected_dates))
+            changed = self.selected_dates.add(date)
         else:
-            button.deselect()
-            if date in self.selected_dates:
-                self.selected_dates.remove(date)
-        # Sorting doesn't matter for saving the note. It's just for readability in the 'Saved to' popup (on window closure)
-        self.selected_dates.sort()
+            changed = self.selected_dates.discard(date)
+        if changed and not self.batch_depth:
+            self.publish_changes()
+
+    # select (or deselect) many dates in one batch, e.g. an imported list.
+    # 'dates' are "YYYY-MM-DD" strings or ordinals. only visible buttons are repainted
+    def select_dates(self, dates, select=True):
+        ordinals = [to_ordinal(date) if isinstance(date, str) else date for date in dates]
+        with self.batch_changes():
+            if select:
+                self.selected_dates.update(ordinals)
+            else:
+                self.selected_dates.difference_update(ordinals)
+            self.repaint_selection()
+
+    # select (or deselect) every date from 'start' to 'end' (inclusive) matching a rule, e.g.
+    #     select_recurring('2024-01-01', '2025-12-31', weekdays=('MON', 'TUE', 'WED', 'THU', 'FRI'))
+    #     select_recurring('2024-01-01', '2024-12-31', days_of_month=(1, 15))
+    # see recurrence() for the rule arguments
+    def select_recurring(self, start, end, weekdays=None, days_of_month=None, select=True):
+        if isinstance(start, str):
+            start = to_ordinal(start)
+        if isinstance(end, str):
+            end = to_ordinal(end)
+        self.select_dates(recurrence(start, end, weekdays, days_of_month), select)
+
+    # bring visible Date_Buttons in line with self.selected_dates after a batch change
+    def repaint_selection(self):
+        for btn in self.button_array:
+            selected = btn.metadata.ordinal in self.selected_dates
+            if selected != btn.metadata.selected:
+                self.count_render(btn.select() if selected else btn.deselect())
 
     def toggle_week_button(self, date_range):
         # determine range
         begin = date_range[0]
         end = date_range[1]
-        btns = self.button_array[begin:end]
-        dates = self.date_list[begin:end]
+        # past, blacked out and unavailable dates are left alone, like single clicks
+        btns = [btn for btn in self.button_array[begin:end] if not btn.rendered[2]]
 
         # assume all btns in week are selected,
         all_selected = True
         for btn in btns:
             # unless there exist one which isn't selected,
-            if not btn.metadata['selected']:
+            if not btn.metadata.selected:
                 # in which case, deslect all:
                 all_selected = False
 
-        for ix, dt in enumerate(dates):
-            btn = btns[ix]
-            if all_selected:
-                # deselect all btns in range
-                self.toggle_date_button(btn, select=False)
-            else:
-                # select all btns in range
-                self.toggle_date_button(btn, select=True)
+        with self.batch_changes():
+            for btn in btns:
+                if all_selected:
+                    # deselect all btns in range
+                    self.toggle_date_button(btn, select=False)
+                else:
+                    # select all btns in range
+                    self.toggle_date_button(btn, select=True)
 
     def set_next_and_last_month(self):
         if self.month == 1:
@@ -545,163 +1199,220 @@ class ButtonCalendar:
         else:
             self.next_month = self.month + 1
 
+    # one (shared, cached) Month_Grid per month of the view
+    def set_grids(self, grids=None):
+        if grids is None:
+            grids = [month_grid(*add_months(self.year, self.month, panel)) for panel in range(self.panels)]
+        self.grids = list(grids)
+        self.grid = self.grids[0]
+        if self.panels == 1:
+            self.date_list = self.grid.dates
+        else:
+            self.date_list = sum((grid.dates for grid in self.grids), ())
+
+    # recycles the Date_Button pool: every button is rebound to its new date and repainted
+    # only if its state changed. no widgets are created
     def refresh(self, event):
         # get new date info
         self.get_new_month_and_year(event)
-        self.date_list = self.build_date_list(self.year, self.month)
+        self.rendered_today = Today.ordinal()
+        state = self.take_view_state(self.year, self.month)
+        self.set_grids(state.grids)
 
         # update month/year btns
         self.set_next_and_last_month()
         self.update_top_buttons()
 
-        # update Date_Buttons
-        for ix, new_date in enumerate(self.date_list):
-            btn = self.button_array[ix]
-            btn.metadata = btn.new_metadata(new_date, self.month)
-            btn.update(text=btn.name(new_date))
-            btn.update(button_color=btn.get_button_color())
-            btn.update(disabled= ButtonCalendar.is_past(new_date))
+        # the buttons are about to be repainted with their base colors, or, in 'range select'
+        # mode, with the part of the span (begun in another month, perhaps) that is now visible
+        self.highlighted = frozenset()
+        if self.range_select_mode:
+            self.highlighted = frozenset(self.buttons_between(*self.get_selection_range()))
+
+        # apply each Date_Button's target state in (at most) one update
+        masks = state.masks
+        heat = state.heat
+        events = state.events
+        # (cells are rebound in place: nothing is allocated per cell unless its widget changes)
+        for ix, btn in enumerate(self.button_array):
+            cell = btn.metadata
+            cell.set_date(self.grids[ix // 42], ix)
+            cell.selected = cell.ordinal in self.selected_dates
+            cell.heat = heat[ix // 42][ix % 42]
+            cell.events = events[ix // 42][ix % 42]
+            self.count_render(btn.render(
+                text=btn.label(),
+                button_color=btn.get_range_select_color(self) if self.range_select_mode
+                    else btn.get_button_color(selected=cell.selected),
+                disabled=masks[ix // 42][ix % 42],
+            ))
+
+    # the View_State of the view starting at (year, month): computed now, without using the cache
+    def view_state(self, year, month):
+        grids = tuple(month_grid(*add_months(year, month, panel)) for panel in range(self.panels))
+        return View_State(
+            grids,
+            [self.disabled_mask(grid) for grid in grids],
+            [self.heat_colors(grid) for grid in grids],
+            [self.event_titles(grid) for grid in grids],
+        )
 
-        for btn in self.button_array:
-            if btn.metadata['date'] in self.selected_dates:
-                btn.select()
-            else:
-                btn.deselect()
+    # what a View_State depends on besides the month. prefetched states are dropped when it changes
+    # (an event provider's version moves when its file changes on disk)
+    def prefetch_key(self):
+        events = None if self.events is None else (self.events, self.events.check())
+        return (self.rendered_today, self.blackout, self.availability, self.heatmap, events)
+
+    def check_prefetched(self):
+        key = self.prefetch_key()
+        if key != self.prefetched_key:
+            self.prefetched = {}
+            self.prefetched_key = key
+
+    # the View_State for refresh(): prefetched if it was prepared during idle time (a hit),
+    # otherwise computed while the user waits (a miss)
+    def take_view_state(self, year, month):
+        self.check_prefetched()
+        state = self.prefetched.get((year, month))
+        if state is None:
+            self.prefetch_misses += 1
+            state = self.prefetched[(year, month)] = self.view_state(year, month)
+        else:
+            self.prefetch_hits += 1
+        self.prefetch_done = False
+        return state
+
+    # prepare the View_States of the neighbouring views (see prefetch_offsets), and forget those no
+    # longer next to the current one. called when the event queue is idle; hosts driving their own
+    # loop get this through timeout events. returns the number of views prepared.
+    # runs on the GUI thread: the state is cheap to build, and Tk must not be touched from a worker
+    def prefetch(self):
+        self.check_prefetched()
+        views = [add_months(self.year, self.month, months) for months in ButtonCalendar.prefetch_offsets]
+        keep = set(views)
+        keep.add((self.year, self.month))
+        for view in [view for view in self.prefetched if view not in keep]:
+            del self.prefetched[view]
+
+        prepared = 0
+        for view in views:
+            if view not in self.prefetched:
+                self.prefetched[view] = self.view_state(*view)
+                prepared += 1
+        self.prefetch_done = True
+        return prepared
+
+    # refreshes served from prefetched state ('hits') vs. computed on demand ('misses')
+    def get_prefetch_stats(self):
+        total = self.prefetch_hits + self.prefetch_misses
+        return {
+            'hits': self.prefetch_hits,
+            'misses': self.prefetch_misses,
+            'hit_rate': self.prefetch_hits / total if total else None,
+        }
 
-    def get_button(self, date):
-        dates = self.date_list
-        ix = dates.index(date)
-        btns = self.button_array
-        btn = btns[ix]
-        return btn
+    # event titles (a tuple per date) for a month grid's 42 cells, from the provider's month index
+    def event_titles(self, grid):
+        if self.events is None:
+            return [()] * 42
+        return self.events.window(grid.ordinals[0], 42)
+
+    # mark the dates of 'provider' (see calendar_events; None removes the marks)
+    def set_events(self, provider):
+        self.events = provider
+        self.refresh(None)
+
+    # event titles on 'date' ("YYYY-MM-DD" or an ordinal), e.g. for a tooltip or status line
+    def get_events(self, date):
+        if self.events is None:
+            return ()
+        return self.events.get(to_ordinal(date) if isinstance(date, str) else date)
+
+    # Heatmap colors (or None) for a month grid's 42 cells: a slice of the precomputed levels
+    def heat_colors(self, grid):
+        if self.heatmap is None:
+            return [None] * 42
+        return self.heatmap.colors(grid.ordinals[0], 42)
+
+    # color unselected dates by 'heatmap' (a Heatmap, or None to go back to the palette)
+    def set_heatmap(self, heatmap):
+        self.heatmap = heatmap
+        self.prefetch_done = False # prefetched colors are stale
+        heat = [self.heat_colors(grid) for grid in self.grids]
+        for ix, btn in enumerate(self.button_array):
+            btn.metadata.heat = heat[ix // 42][ix % 42]
+            self.count_render(btn.render(
+                button_color=btn.get_range_select_color(self) if self.range_select_mode
+                    else btn.get_button_color(selected=btn.metadata.selected)
+            ))
+
+    # 42 flags for a month grid's cells: True for past, blacked out or unavailable dates.
+    # each index is queried once for the grid's window, not date by date
+    def disabled_mask(self, grid):
+        first = grid.ordinals[0]
+        mask = [ordinal < self.rendered_today for ordinal in grid.ordinals]
+        if self.blackout is not None:
+            mask = [a or b for a, b in zip(mask, self.blackout.mask(first, 42))]
+        if self.availability is not None:
+            mask = [a or not b for a, b in zip(mask, self.availability.mask(first, 42))]
+        return mask
+
+    # disable every date in 'intervals' ((first, last) pairs, both ends inclusive, as "YYYY-MM-DD"
+    # strings or ordinals), or an Interval_Index. replaces the previous blackout; None clears it
+    def set_blackout(self, intervals):
+        self.blackout = None if intervals is None else self.to_interval_index(intervals)
+        self.repaint_disabled()
+
+    # disable every date outside 'intervals' (as in set_blackout()). None enables all dates again
+    def set_availability(self, intervals):
+        self.availability = None if intervals is None else self.to_interval_index(intervals)
+        self.repaint_disabled()
+
+    def to_interval_index(self, intervals):
+        if isinstance(intervals, Interval_Index):
+            return intervals
+        return Interval_Index(intervals)
+
+    # bring the visible Date_Buttons' disabled state in line with the blackout and availability
+    def repaint_disabled(self):
+        self.prefetch_done = False # prefetched masks are stale
+        masks = [self.disabled_mask(grid) for grid in self.grids]
+        for ix, btn in enumerate(self.button_array):
+            self.count_render(btn.render(disabled=masks[ix // 42][ix % 42]))
+
+    # tally Date_Button.render() results, so skipped (unchanged) repaints can be measured
+    def count_render(self, updated):
+        if updated:
+            self.updates_issued += 1
+        else:
+            self.updates_skipped += 1
 
+    # prefers the button in the month the date belongs to, in a multi-month view
+    def get_button(self, date):
+        found = None
+        for panel, grid in enumerate(self.grids):
+            ix = grid.index.get(date)
+            if ix is not None:
+                if grid.months[ix] == grid.month:
+                    return self.button_array[42 * panel + ix]
+                if found is None:
+                    found = self.button_array[42 * panel + ix]
+        if found is None:
+            raise KeyError(date)
+        return found
+
+    # every visible Date_Button showing 'ordinal' (more than one where months overlap)
+    def buttons_for(self, ordinal):
+        btns = []
+        for panel, grid in enumerate(self.grids):
+            ix = ordinal - grid.ordinals[0]
+            if 0 <= ix < 42:
+                btns.append(self.button_array[42 * panel + ix])
+        return btns
+
+    # returns a shared, immutable tuple. see month_grid()
     def build_date_list(self, year, month, date_format='%Y-%m-%d'):
-        dates = []
-
-        # start on the Sunday before the 1st of the month
-        dt = self.sunday_before_first(year, month)
-
-        for offset in range(42):
-            dt += datetime.timedelta(days=1)
-
-            dates.append(dt.strftime(date_format))
-
-        return dates
-
-    class Week_Button(gui.Button):
-        def __init__(self, week):
-            date_range = [7 * week, 7 * week + 7]
-            # P(date_range)
-            super().__init__(
-                '+/-',
-                size=(3, 1),
-                font=ButtonCalendar.font('calendar_button'),
-                pad=(1, 1),
-                auto_size_button=False,
-                metadata={'date_range': date_range},
-                key='week_select_' + str(week),
-                button_color=(
-                    ButtonCalendar.palette['text_default'],
-                    ButtonCalendar.palette['default'],
-                ),
-            )
-
-    class Date_Button(gui.Button):
-        def __init__(self,
-                     date,
-                     parent_calendar_month,
-                     ix,
-                     selected=False):
-
-            self.metadata = self.new_metadata(date, parent_calendar_month)
-            
-            self.ix = ix
-
-            color = self.get_button_color(selected)
-
-            super().__init__(
-                self.name(date),
-                key='date_btn_' + str(self.ix),
-                size=(3, 1),
-                pad=(1, 1),
-                metadata=self.metadata,
-                button_color=color,
-                font=ButtonCalendar.font('calendar_button'),
-                disabled= ButtonCalendar.is_past(date), # disable past dates
-            )
-
-        def new_metadata(self, date, parent_calendar_month):
-            return {
-                'selected': False,
-                'date': date,
-                'button_month': self.get_button_month(date),
-                'parent_month': parent_calendar_month,
-            }
-
-        def get_button_month(self, date):
-            return int(date[5:7])
-
-        def get_button_color(self, selected=False, is_range_select_anchor= False):
-            if selected:
-                color = (
-                    ButtonCalendar.palette['text_selected'],
-                    ButtonCalendar.palette['selected'],
-                )
-
-            elif is_range_select_anchor:
-                color = (
-                    ButtonCalendar.palette['text_selected'],
-                    ButtonCalendar.palette['range_select_anchor'],
-                )
-            
-            # unselected, within current month
-            elif self.metadata['button_month'] == self.metadata['parent_month']:
-                color = (
-                    ButtonCalendar.palette['text_default'],
-                    ButtonCalendar.palette['default'],
-                )
-                
-            # unselected, outside of current month
-            else:
-                color = (
-                    ButtonCalendar.palette['text_selected'],
-                    ButtonCalendar.palette['off_month'],
-                )
-
-            return color
-
-        def name(self, date):
-            return str(date)[-2:]
-        
-        def toggle(self, select):
-            self.metadata['selected'] = select
-            self.update(button_color=self.get_button_color(selected= select))
-
-        def select(self):
-            self.toggle(select= True)
-
-        def deselect(self):
-            self.toggle(select= False)
-            
-        # right-click, init 'range select mode'
-        def set_to_range_select_anchor(self, parent_calendar):
-            parent_calendar.range_select_anchor = self.ix
-            self.update(
-                button_color=(
-                    ButtonCalendar.palette['text_selected'],
-                    ButtonCalendar.palette['range_select_anchor'],
-                )
-            )
-            
-        def on_range_select_mouse_over(self, parent_calendar):
-            if parent_calendar.range_select_anchor != self.ix:
-                self.update(
-                    button_color=(
-                        ButtonCalendar.palette['text_selected'],
-                        ButtonCalendar.palette['range_select_hover'],
-                    )
-                )
-                
+        return month_grid(year, month, date_format).dates
 
 def main():
     print(ButtonCalendar().window())
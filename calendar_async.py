@@ -0,0 +1,103 @@
+# © 2021-2023 Jacob Branch
+# version 1.0.0
+
+import asyncio
+import button_calendar
+from button_calendar import ButtonCalendar, Calendar_Router
+
+
+### asyncio driver for ButtonCalendar. polls the window with non-blocking reads from the
+### event loop, so network lookups, saves etc. can run alongside the UI without a GUI thread
+### (and without locking around the selection, since everything runs on the loop's thread).
+###
+###     driver = Async_Calendar_Driver(ButtonCalendar())  # opens the self-windowed calendar
+###     asyncio.create_task(driver.run())
+###     async for calendar, selected_dates in driver.changes():
+###         ...
+
+
+
+class Async_Calendar_Driver:
+    # 'target' is a ButtonCalendar, or a Calendar_Router for several calendars in one window.
+    # without a 'window', a ButtonCalendar opens its own (see ButtonCalendar.open_window()).
+    # 'poll_interval' (seconds) is how long run() sleeps when the window has no events
+    def __init__(self, target, window=None, poll_interval=0.02):
+        self.target = target
+        if isinstance(target, Calendar_Router):
+            self.calendars = target.calendars
+        else:
+            self.calendars = [target]
+
+        # the Tools menu only exists on a window the calendar opened itself
+        self.own_window = window is None
+        if window is None:
+            window = target.open_window()
+        self.window = window
+
+        self.poll_interval = poll_interval
+        self.running = False
+        self.queues = [] # one per changes() iterator
+        self.versions = [self.version(calendar) for calendar in self.calendars]
+
+    def version(self, calendar):
+        return (calendar.selected_dates, calendar.selected_dates.version)
+
+    # handle events until the window is closed. returns the selected dates (of the first calendar)
+    async def run(self):
+        gui = button_calendar.gui
+        self.running = True
+        try:
+            while self.running:
+                event, values = self.window.read(timeout=0)
+
+                if ButtonCalendar.is_exit_event(event):
+                    break
+
+                # the timeout still goes to the calendars: it applies coalesced navigation
+                # and catches midnight rollover
+                if not (self.own_window and self.target.handle_menu_event(event)):
+                    self.target.handle_event(event, self.window)
+                self.publish_changes()
+
+                if event == gui.TIMEOUT_KEY:
+                    await asyncio.sleep(self.poll_interval)
+                else:
+                    await asyncio.sleep(0) # let other tasks run between bursts of events
+        finally:
+            self.running = False
+            if self.own_window:
+                self.window.close()
+            for queue in self.queues:
+                queue.put_nowait(None)
+
+        return self.calendars[0].get_selected_dates()
+
+    # ask run() to return after the current event
+    def stop(self):
+        self.running = False
+
+    # queue a (calendar, selected_dates) snapshot for every calendar whose selection changed
+    def publish_changes(self):
+        for ix, calendar in enumerate(self.calendars):
+            version = self.version(calendar)
+            if version != self.versions[ix]:
+                self.versions[ix] = version
+                for queue in self.queues:
+                    queue.put_nowait((calendar, calendar.get_selected_dates()))
+
+    # async iterator of (calendar, selected_dates) for each change to a selection.
+    # ends when run() returns. changes are queued from the moment this is called
+    def changes(self):
+        queue = asyncio.Queue()
+        self.queues.append(queue)
+        return self.iterate(queue)
+
+    async def iterate(self, queue):
+        try:
+            while True:
+                change = await queue.get()
+                if change is None:
+                    return
+                yield change
+        finally:
+            self.queues.remove(queue)
@@ -0,0 +1,757 @@
+# © 2021-2023 Jacob Branch
+# version 1.0.0
+
+import datetime
+import functools
+import mmap
+import os
+import struct
+import sys
+import time
+from bisect import bisect_left, bisect_right, insort
+from collections import Counter, namedtuple
+from types import MappingProxyType
+
+
+### headless core of ButtonCalendar: dates, month grids, the selection store and its file format.
+### imports only the standard library, so it loads quickly and works without a display
+### (e.g. in worker processes). see button_calendar.py for the widget itself.
+
+
+
+month_names = (
+    'JAN',
+    'FEB',
+    'MAR',
+    'APR',
+    'MAY',
+    'JUN',
+    'JUL',
+    'AUG',
+    'SEP',
+    'OCT',
+    'NOV',
+    'DEC',
+)
+
+# 'm' is ordinal number of month (i.e. JAN == 1, DEC == 12)
+def month_name(m):
+    return month_names[m - 1] # 'm-1' is its index in this tuple
+
+day_names = ('SUN',
+             'MON',
+             'TUE',
+             'WED',
+             'THU',
+             'FRI',
+             'SAT')
+
+def font(style="label_small"):
+    fonts = {
+        "label": ("consolas bold", 8),
+        "label_small": ("consolas", 6),
+        "calendar_button": ("consolas bold", 10),
+    }
+    if style:
+        return fonts[style]
+    else:
+        return fonts
+    
+def get_palette():
+    
+    black = "#FFFFFF"
+    white = "#000000"
+    med_grey = "#AAAAAA"
+    dim_grey = "#6B7B82"
+    
+    navy = "#183440"
+    red_gold = "#f3c03f"
+    gold = "#F4E04D"
+    bright_gold = "#F9EE9F"
+    teal = "#2E6B5E"
+    brick = "#B03A2E"
+    
+    colors = {
+        "default": navy,
+        "text_default": black,
+        
+        "selected": gold,
+        "text_selected": white,
+        
+        "off_month": med_grey,
+        "text_disabled": dim_grey, # Date_Canvas cells only; Tk greys out disabled buttons itself
+        
+        "range_select_anchor": red_gold,
+        "range_select_hover": bright_gold,
+
+        # ends of the Heatmap color ramp
+        "heat_low": teal,
+        "heat_high": brick,
+    }
+    return colors
+
+palette = get_palette()
+
+
+# dates are handled internally as proleptic ordinals (datetime.date.toordinal()),
+# and only converted to "YYYY-MM-DD" strings at the API boundary
+def to_ordinal(yyyy_mm_dd:str):
+    return datetime.date.fromisoformat(yyyy_mm_dd).toordinal()
+
+def to_date_string(ordinal:int):
+    return datetime.date.fromordinal(ordinal).isoformat()
+
+
+# today's date as an ordinal, cached until the next local midnight. checking it costs a
+# clock read rather than a datetime.date.today() call, so it is cheap enough for every event
+class Today:
+    _ordinal = None
+    _expires = 0.0
+
+    def ordinal():
+        if time.time() >= Today._expires:
+            now = datetime.datetime.now()
+            midnight = datetime.datetime.combine(now.date() + datetime.timedelta(days=1), datetime.time())
+            Today._ordinal = now.date().toordinal()
+            Today._expires = midnight.timestamp()
+        return Today._ordinal
+
+    # force the date to be re-read on next use (e.g. after a system clock change)
+    def tick():
+        Today._expires = 0.0
+
+    # read() timeout that wakes the event loop just after midnight
+    def ms_until_midnight():
+        now = datetime.datetime.now()
+        midnight = datetime.datetime.combine(now.date() + datetime.timedelta(days=1), datetime.time())
+        return int((midnight - now).total_seconds() * 1000) + 1000
+
+
+# sorted, set-backed store of selected dates (ordinals).
+# membership is a set lookup; order is kept in a list of sorted chunks, so an
+# insert or delete only shifts one bounded chunk instead of the whole selection
+class Date_Selection:
+    chunk_size = 512
+
+    def __init__(self, dates=()):
+        # bumped on every change, so exports of an unchanged selection can be cached
+        self.version = 0
+        # dates added/removed since the last pop_changes(). see Selection_File
+        self._added = set()
+        self._removed = set()
+        self._rebuild(set())
+        self.update(dates)
+
+    def _rebuild(self, members):
+        self._members = members
+        ordered = sorted(members)
+        size = Date_Selection.chunk_size
+        self._chunks = [ordered[ix:ix + size] for ix in range(0, len(ordered), size)]
+        self._maxes = [chunk[-1] for chunk in self._chunks]
+
+    def __contains__(self, date):
+        return date in self._members
+
+    def __len__(self):
+        return len(self._members)
+
+    def __iter__(self):
+        for chunk in self._chunks:
+            yield from chunk
+
+    # returns True if 'date' was not already selected
+    def add(self, date):
+        if date in self._members:
+            return False
+        self._members.add(date)
+        self._added.add(date)
+        self._removed.discard(date)
+        self.version += 1
+
+        if not self._chunks:
+            self._chunks.append([date])
+            self._maxes.append(date)
+            return True
+
+        ix = bisect_left(self._maxes, date)
+        # past the end of the last chunk: append to it
+        if ix == len(self._maxes):
+            ix -= 1
+            self._chunks[ix].append(date)
+            self._maxes[ix] = date
+        else:
+            insort(self._chunks[ix], date)
+
+        # split oversized chunks in half
+        chunk = self._chunks[ix]
+        if len(chunk) > 2 * Date_Selection.chunk_size:
+            half = len(chunk) // 2
+            self._chunks[ix:ix + 1] = [chunk[:half], chunk[half:]]
+            self._maxes[ix:ix + 1] = [chunk[half - 1], chunk[-1]]
+        return True
+
+    # returns True if 'date' was selected
+    def discard(self, date):
+        if date not in self._members:
+            return False
+        self._members.discard(date)
+        self._removed.add(date)
+        self._added.discard(date)
+        self.version += 1
+
+        ix = bisect_left(self._maxes, date)
+        chunk = self._chunks[ix]
+        del chunk[bisect_left(chunk, date)]
+        if chunk:
+            self._maxes[ix] = chunk[-1]
+        else:
+            del self._chunks[ix]
+            del self._maxes[ix]
+        return True
+
+    # add many dates in one batch. returns the set of dates that weren't already selected.
+    # large batches re-sort once instead of inserting date by date
+    def update(self, dates):
+        added = set(dates) - self._members
+        if len(added) < Date_Selection.chunk_size:
+            for date in added:
+                self.add(date)
+        else:
+            self._rebuild(self._members | added)
+            self._added |= added
+            self._removed -= added
+            self.version += 1
+        return added
+
+    # remove many dates in one batch. returns the set of dates that were selected
+    def difference_update(self, dates):
+        removed = self._members.intersection(dates)
+        if len(removed) < Date_Selection.chunk_size:
+            for date in removed:
+                self.discard(date)
+        else:
+            self._rebuild(self._members - removed)
+            self._removed |= removed
+            self._added -= removed
+            self.version += 1
+        return removed
+
+    # select every date from 'first' to 'last' (inclusive) as one interval operation.
+    # returns the set of dates that weren't already selected
+    def update_range(self, first, last):
+        span = range(first, last + 1)
+        added = set(span).difference(self._members)
+        if not added:
+            return added
+        self._members |= added
+        self._added |= added
+        self._removed -= added
+        self.version += 1
+        self._splice(first, last, list(span))
+        return added
+
+    # deselect every date from 'first' to 'last' (inclusive). returns the set of dates that were selected
+    def difference_update_range(self, first, last):
+        removed = self._members.intersection(range(first, last + 1))
+        if not removed:
+            return removed
+        self._members -= removed
+        self._removed |= removed
+        self._added -= removed
+        self.version += 1
+        self._splice(first, last, [])
+        return removed
+
+    # replace the ordered members from 'first' to 'last' with 'dates' (sorted, all within the span).
+    # only the chunks overlapping the span are rebuilt
+    def _splice(self, first, last, dates):
+        lo = bisect_left(self._maxes, first)
+        hi = bisect_left(self._maxes, last + 1)
+        # the chunk ending past the span may still start inside it
+        if hi < len(self._chunks) and self._chunks[hi][0] <= last:
+            hi += 1
+
+        merged = dates
+        if lo < hi:
+            head = self._chunks[lo]
+            tail = self._chunks[hi - 1]
+            merged = head[:bisect_left(head, first)] + dates + tail[bisect_left(tail, last + 1):]
+
+        size = Date_Selection.chunk_size
+        chunks = [merged[ix:ix + size] for ix in range(0, len(merged), size)]
+        self._chunks[lo:hi] = chunks
+        self._maxes[lo:hi] = [chunk[-1] for chunk in chunks]
+
+    # returns (added, removed): the dates whose selection changed since the last call
+    def pop_changes(self):
+        changes = (self._added, self._removed)
+        self._added = set()
+        self._removed = set()
+        return changes
+
+
+# sorted ordinals -> (start, end) runs of consecutive dates, both ends inclusive
+def to_runs(ordinals):
+    start = end = None
+    for ordinal in ordinals:
+        if end is not None and ordinal == end + 1:
+            end = ordinal
+            continue
+        if start is not None:
+            yield (start, end)
+        start = end = ordinal
+    if start is not None:
+        yield (start, end)
+
+
+# sorted (first, last) date intervals, both ends inclusive, e.g. blackouts or a resource's
+# availability. overlapping and adjacent intervals are merged when the index is built, so both
+# the starts and the ends are sorted: a window query is one bisect plus a walk over the k
+# intervals it overlaps. endpoints are "YYYY-MM-DD" strings or ordinals
+class Interval_Index:
+    def __init__(self, intervals=()):
+        self.starts = []
+        self.ends = []
+        pairs = sorted(
+            (to_ordinal(first) if isinstance(first, str) else first,
+             to_ordinal(last) if isinstance(last, str) else last)
+            for first, last in intervals
+        )
+        for first, last in pairs:
+            if last < first:
+                continue
+            if self.ends and first <= self.ends[-1] + 1:
+                self.ends[-1] = max(self.ends[-1], last)
+            else:
+                self.starts.append(first)
+                self.ends.append(last)
+
+    def __len__(self):
+        return len(self.starts)
+
+    def __contains__(self, date):
+        ix = bisect_right(self.starts, date) - 1
+        return ix >= 0 and date <= self.ends[ix]
+
+    def __iter__(self):
+        return zip(self.starts, self.ends)
+
+    # (first, last) of each interval overlapping the dates 'first' to 'last' (inclusive),
+    # clipped to them
+    def overlapping(self, first, last):
+        ix = bisect_left(self.ends, first)
+        while ix < len(self.starts) and self.starts[ix] <= last:
+            yield max(self.starts[ix], first), min(self.ends[ix], last)
+            ix += 1
+
+    # (first, last) runs of the dates from 'first' to 'last' that no interval covers
+    def gaps(self, first, last):
+        for start, end in self.overlapping(first, last):
+            if first < start:
+                yield first, start - 1
+            first = end + 1
+        if first <= last:
+            yield first, last
+
+    # list of 'count' flags, True where the date 'first' + offset is covered
+    def mask(self, first, count):
+        flags = [False] * count
+        for start, end in self.overlapping(first, first + count - 1):
+            flags[start - first:end - first + 1] = [True] * (end - start + 1)
+        return flags
+
+
+# evenly spaced colors from "#RRGGBB" 'low' to 'high', both included
+def color_ramp(low, high, steps):
+    low = [int(low[ix:ix + 2], 16) for ix in (1, 3, 5)]
+    high = [int(high[ix:ix + 2], 16) for ix in (1, 3, 5)]
+    ramp = []
+    for step in range(steps):
+        t = step / (steps - 1) if steps > 1 else 1.0
+        ramp.append('#{:02X}{:02X}{:02X}'.format(*(round(a + (b - a) * t) for a, b in zip(low, high))))
+    return tuple(ramp)
+
+
+# per-day metric (e.g. bookings per day) binned once into a color level per date, so painting
+# a month is a slice of the levels rather than a re-aggregation. build it from
+#     values:     {date: number}, dates as "YYYY-MM-DD" strings, ordinals or datetime.dates
+#     timestamps: unix timestamps (seconds); each counts 1 towards its day. days are local to
+#                 'utc_offset' (seconds east of UTC), or by default to this machine's time zone,
+#                 with each timestamp's own offset (so dates either side of a DST change are right)
+# days without data keep their usual color. 'low'/'high' clamp the scale (default: the data's range).
+# the ramp ('steps' colors, or 'colors') holds at most 255 colors
+class Heatmap:
+    unix_epoch = datetime.date(1970, 1, 1).toordinal()
+
+    def __init__(self, values=None, timestamps=None, utc_offset=None, steps=8,
+                 low=None, high=None, colors=None):
+        totals = {}
+        if values is not None:
+            for date, value in values.items():
+                if isinstance(date, str):
+                    date = to_ordinal(date)
+                elif isinstance(date, datetime.date):
+                    date = date.toordinal()
+                totals[date] = totals.get(date, 0) + value
+
+        if timestamps is not None:
+            if utc_offset is None:
+                # count per quarter hour in one C-level pass (every UTC offset is a whole number
+                # of quarter hours), then put each quarter hour on its local day
+                quarters = Counter(map((900).__rfloordiv__, map(int, timestamps)))
+                days = Counter()
+                for quarter, count in quarters.items():
+                    seconds = quarter * 900
+                    days[(seconds + time.localtime(seconds).tm_gmtoff) // 86400] += count
+            else:
+                # one C-level pass over the rows: floor to days, then count
+                days = Counter(map((86400).__rfloordiv__, map(int(utc_offset).__add__, map(int, timestamps))))
+            for day, count in days.items():
+                date = day + Heatmap.unix_epoch
+                totals[date] = totals.get(date, 0) + count
+
+        self.ramp = tuple(colors or color_ramp(palette['heat_low'], palette['heat_high'], steps))
+        if not 1 <= len(self.ramp) <= 255: # levels are bytes, with 0 for 'no data'
+            raise ValueError('a heatmap needs 1 to 255 colors, not ' + str(len(self.ramp)))
+        self.lookup = (None,) + self.ramp # by level
+        self.totals = totals
+        # levels[date - first] is 0 for no data, else 1 + an index into self.ramp
+        self.first = min(totals) if totals else 0
+        self.levels = bytearray(max(totals) - self.first + 1 if totals else 0)
+        if not totals:
+            return
+
+        low = min(totals.values()) if low is None else low
+        high = max(totals.values()) if high is None else high
+        scale = (len(self.ramp) - 1) / (high - low) if high > low else 0
+        top = len(self.ramp) - 1
+        for date, value in totals.items():
+            level = round((value - low) * scale) if scale else top
+            self.levels[date - self.first] = 1 + min(max(level, 0), top)
+
+    # the metric for one date (ordinal), or None
+    def get(self, date):
+        return self.totals.get(date)
+
+    # colors for the 'count' dates from 'first': a ramp color, or None where there is no data
+    def colors(self, first, count):
+        lookup = self.lookup
+        start = first - self.first
+        window = self.levels[max(start, 0):max(start + count, 0)]
+        lead = min(max(-start, 0), count)
+        return [None] * lead + [lookup[level] for level in window] + [None] * (count - lead - len(window))
+
+
+# compact on-disk selection: an 8 byte header, then an append-only log of 12 byte records,
+# each selecting or deselecting a run of consecutive dates (op, first ordinal, last ordinal).
+# save() writes the whole selection as runs once, then only appends the changes made since;
+# the log is rewritten as a fresh snapshot once it has grown well past one.
+# load() memory-maps the file and replays the log
+class Selection_File:
+    header = struct.Struct('<4sHH') # magic, version, reserved
+    record = struct.Struct('<B3xii') # op (1 == select, 0 == deselect), first, last
+    magic = b'BCAL'
+    version = 1
+
+    def __init__(self, path):
+        self.path = path
+        self.snapshot_records = 0 # records written by the last full snapshot
+        self.records = 0 # records in the file
+        self.in_sync = False # True once the file on disk reflects a snapshot we wrote or loaded
+
+    # returns the set of selected ordinals (empty if the file doesn't exist)
+    def load(self):
+        selected = set()
+        self.records = 0
+        if not os.path.exists(self.path) or os.path.getsize(self.path) < Selection_File.header.size:
+            self.in_sync = False
+            return selected
+
+        with open(self.path, 'rb') as file:
+            with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                magic, version, _ = Selection_File.header.unpack_from(mapped)
+                if magic != Selection_File.magic or version != Selection_File.version:
+                    raise ValueError(self.path + ' is not a ButtonCalendar selection file')
+
+                # ignore a partially written trailing record
+                start = Selection_File.header.size
+                end = start + (len(mapped) - start) // Selection_File.record.size * Selection_File.record.size
+                with memoryview(mapped)[start:end] as records:
+                    for op, first, last in Selection_File.record.iter_unpack(records):
+                        if op:
+                            selected.update(range(first, last + 1))
+                        else:
+                            selected.difference_update(range(first, last + 1))
+                        self.records += 1
+
+        self.snapshot_records = self.records
+        # appending after a torn record would misalign the log, so the next save rewrites it
+        self.in_sync = end == os.path.getsize(self.path)
+        return selected
+
+    # 'selection' is the full Date_Selection, 'changes' its pop_changes() since the last save
+    def save(self, selection, changes):
+        added, removed = changes
+        compact = self.records > 2 * self.snapshot_records + 256
+        if not self.in_sync or compact or not os.path.exists(self.path):
+            self.write_snapshot(selection)
+            return
+
+        with open(self.path, 'ab') as file:
+            file.write(self.encode(0, removed) + self.encode(1, added))
+
+    def write_snapshot(self, selection):
+        self.records = 0
+        body = self.encode(1, selection)
+        # write a temporary file and swap it in, so a crash never leaves half a snapshot
+        temp = self.path + '.tmp'
+        with open(temp, 'wb') as file:
+            file.write(Selection_File.header.pack(Selection_File.magic, Selection_File.version, 0))
+            file.write(body)
+        os.replace(temp, self.path)
+
+        self.snapshot_records = self.records
+        self.in_sync = True
+
+    # encode a batch of ordinals as run records. counts them into self.records
+    def encode(self, op, ordinals):
+        if not isinstance(ordinals, Date_Selection):
+            ordinals = sorted(ordinals)
+        pack = Selection_File.record.pack
+        records = [pack(op, first, last) for first, last in to_runs(ordinals)]
+        self.records += len(records)
+        return b''.join(records)
+
+
+# ordinals from 'start' to 'end' (inclusive) that match a recurrence rule.
+# 'weekdays' are day names from day_names ('SUN'..'SAT') or numbers (SUN == 0),
+# 'days_of_month' are 1..31, or negative to count back from the end of the month (-1 == last day).
+# when both are given a date must match both; with neither, every date matches.
+# dates are generated with range() strides over ordinals rather than day by day
+def recurrence(start, end, weekdays=None, days_of_month=None):
+    if end < start:
+        return set()
+
+    dates = None
+
+    if weekdays is not None:
+        dates = set()
+        for weekday in weekdays:
+            if isinstance(weekday, str):
+                weekday = day_names.index(weekday.upper())
+            # ordinal 1 (0001-01-01) is a Monday, so 'ordinal % 7' counts from SUN == 0
+            first = start + (weekday - start) % 7
+            dates.update(range(first, end + 1, 7))
+
+    if days_of_month is not None:
+        by_day = set()
+        first = datetime.date.fromordinal(start)
+        last = datetime.date.fromordinal(end)
+        year, month = first.year, first.month
+        while (year, month) <= (last.year, last.month):
+            month_start = datetime.date(year, month, 1).toordinal() - 1
+            length = datetime.date(*add_months(year, month, 1), 1).toordinal() - 1 - month_start
+            for day in days_of_month:
+                if day < 0:
+                    day += length + 1
+                if 1 <= day <= length and start <= month_start + day <= end:
+                    by_day.add(month_start + day)
+            year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+        dates = by_day if dates is None else dates & by_day
+
+    if dates is None:
+        dates = set(range(start, end + 1))
+
+    return dates
+
+
+# ordinal of the first cell in a month's grid
+def first_cell(year, month):
+    first = datetime.date(year, month, 1)
+    # step back to the previous Sunday, or a full week if the 1st is a Sunday
+    return first.toordinal() - (first.isoweekday() % 7 or 7)
+
+
+def sunday_before_first(year, month):
+
+    first = datetime.datetime(year, month, 1)
+    # get day of week from 'first' SUN=1 SAT=7
+    dow = int(first.strftime('%w')) + 1
+
+    # roll back one extra week if month starts on a Sunday
+    if dow == 1:
+        dow = 8
+
+    #'last sunday' is 'first' minus the numerical day of week
+    first_sun = first - datetime.timedelta(days=dow)
+    return first_sun
+
+
+# (year, month) 'n' months after (or before, if negative) the given one
+def add_months(year, month, n):
+    year, month = divmod(year * 12 + month - 1 + n, 12)
+    return year, month + 1
+
+
+# immutable 6-week (42 cell) grid for one month.
+# 'ordinals' and 'months' (the month each cell falls in) drive rendering; 'dates' are the
+# formatted strings, and 'index' maps each of them to its cell, so lookups don't need dates.index().
+# 'labels' are the cells' button texts (the last 2 characters of each date), shared between grids
+Month_Grid = namedtuple('Month_Grid', ('year', 'month', 'dates', 'index', 'ordinals', 'months', 'labels'))
+
+
+# grids are built once per (year, month, date_format) and shared by every ButtonCalendar
+# in the process. least recently used grids are evicted past 'maxsize' (10 years of months)
+@functools.lru_cache(maxsize=120)
+def month_grid(year, month, date_format='%Y-%m-%d'):
+    # start on the Sunday before the 1st of the month
+    first = first_cell(year, month)
+    ordinals = tuple(range(first, first + 42))
+    days = [datetime.date.fromordinal(ordinal) for ordinal in ordinals]
+
+    dates = tuple(day.strftime(date_format) for day in days)
+    months = tuple(day.month for day in days)
+
+    # first occurrence wins, matching dates.index() (a format without year/month can repeat)
+    index = {}
+    for ix, date in enumerate(dates):
+        index.setdefault(date, ix)
+
+    labels = tuple(sys.intern(date[-2:]) for date in dates)
+
+    return Month_Grid(year, month, dates, MappingProxyType(index), ordinals, months, labels)
+
+
+# state of one cell of the date grid, kept apart from the widget that shows it (see calendar_widgets).
+# slotted, and rebound in place on navigation (set_date()), so a calendar's 42 cells cost a few
+# hundred bytes each and a refresh allocates nothing per cell. cell['name'] item access is kept
+# for code written against the old metadata dicts
+class Cell:
+    __slots__ = ('date', 'ordinal', 'label', 'button_month', 'parent_month', 'selected', 'heat', 'events')
+
+    def __init__(self, grid, ix):
+        self.set_date(grid, ix)
+        self.selected = False
+        self.heat = None
+        self.events = ()
+
+    # rebind to cell 'ix' of 'grid' (a Month_Grid; 'ix' may be a pool index, see ix % 42)
+    def set_date(self, grid, ix):
+        ix = ix % 42 # cell within the month
+        self.date = grid.dates[ix]
+        self.ordinal = grid.ordinals[ix]
+        self.label = grid.labels[ix]
+        self.button_month = grid.months[ix]
+        self.parent_month = grid.month
+
+    def __getitem__(self, name):
+        return getattr(self, name)
+
+    def __setitem__(self, name, value):
+        setattr(self, name, value)
+
+
+# opt-in per-event instrumentation (see ButtonCalendar(instrument=...)). for each event kind it
+# keeps a count and fixed-size log2 histograms of handler latency, widget updates issued and
+# selection size, so memory stays bounded however long the session runs.
+# with 'dump_interval' (seconds), format_summary() is passed to 'dump' at most that often
+class Event_Stats:
+    # bucket b counts values below 2**b (microseconds for latency); the last one is open-ended
+    # (> ~4s, or > ~4M updates / dates)
+    buckets = 23
+    # histogram and maximum kept for each metric, see quantile()
+    metrics = {
+        'us': ('histogram', 'max_us'),
+        'updates': ('updates_histogram', 'max_updates'),
+        'selection': ('selection_histogram', 'max_selection'),
+    }
+
+    def __init__(self, dump_interval=None, dump=print):
+        self.kinds = {}
+        self.dump_interval = dump_interval
+        self.dump = dump
+        self.last_dump = time.monotonic()
+
+    def record(self, kind, seconds, updates, selection_size):
+        stats = self.kinds.get(kind)
+        if stats is None:
+            stats = self.kinds[kind] = {
+                'count': 0,
+                'total_us': 0.0,
+                'max_us': 0.0,
+                'histogram': [0] * Event_Stats.buckets,
+                'updates': 0,
+                'max_updates': 0,
+                'updates_histogram': [0] * Event_Stats.buckets,
+                'selection_size': 0,
+                'max_selection': 0,
+                'selection_histogram': [0] * Event_Stats.buckets,
+            }
+        top = Event_Stats.buckets - 1
+        us = seconds * 1e6
+        stats['count'] += 1
+        stats['total_us'] += us
+        stats['max_us'] = max(stats['max_us'], us)
+        stats['histogram'][min(int(us).bit_length(), top)] += 1
+        stats['updates'] += updates
+        stats['max_updates'] = max(stats['max_updates'], updates)
+        stats['updates_histogram'][min(updates.bit_length(), top)] += 1
+        stats['selection_size'] = selection_size
+        stats['max_selection'] = max(stats['max_selection'], selection_size)
+        stats['selection_histogram'][min(selection_size.bit_length(), top)] += 1
+
+        if self.dump_interval is not None and time.monotonic() - self.last_dump >= self.dump_interval:
+            self.last_dump = time.monotonic()
+            self.dump(self.format_summary())
+
+    # upper bound of the histogram bucket holding the 'fraction' quantile of one kind's 'metric':
+    # 'us' (latency, microseconds), 'updates' (widget updates per event) or 'selection' (dates selected)
+    def quantile(self, kind, fraction, metric='us'):
+        stats = self.kinds[kind]
+        histogram, maximum = Event_Stats.metrics[metric]
+        histogram, maximum = stats[histogram], stats[maximum]
+        target = fraction * stats['count']
+        seen = 0
+        for bucket, count in enumerate(histogram):
+            seen += count
+            if count and seen >= target:
+                # latency is fractional; counts in bucket b are at most 2**b - 1
+                return min(2 ** bucket if metric == 'us' else 2 ** bucket - 1, maximum)
+        return maximum
+
+    # {kind: {'count', 'mean_us', 'p50_us', 'p99_us', 'max_us', 'updates_per_event', 'p50_updates',
+    #         'p99_updates', 'max_updates', 'selection_size', 'p50_selection', 'p99_selection', 'max_selection'}}
+    # 'selection_size' is the size after the kind's latest event
+    def summary(self):
+        summary = {}
+        for kind, stats in self.kinds.items():
+            summary[kind] = {
+                'count': stats['count'],
+                'mean_us': stats['total_us'] / stats['count'],
+                'p50_us': self.quantile(kind, 0.5),
+                'p99_us': self.quantile(kind, 0.99),
+                'max_us': stats['max_us'],
+                'updates_per_event': stats['updates'] / stats['count'],
+                'p50_updates': self.quantile(kind, 0.5, 'updates'),
+                'p99_updates': self.quantile(kind, 0.99, 'updates'),
+                'max_updates': stats['max_updates'],
+                'selection_size': stats['selection_size'],
+                'p50_selection': self.quantile(kind, 0.5, 'selection'),
+                'p99_selection': self.quantile(kind, 0.99, 'selection'),
+                'max_selection': stats['max_selection'],
+            }
+        return summary
+
+    # slowest kinds first
+    def format_summary(self):
+        summary = self.summary()
+        lines = ['{:<18} {:>8} {:>10} {:>10} {:>10} {:>8} {:>8} {:>10} {:>10}'.format(
+            'event', 'count', 'mean_us', 'p99_us', 'max_us', 'updates', 'p99_upd', 'selected', 'p99_sel')]
+        for kind, stats in sorted(summary.items(), key=lambda item: -item[1]['p99_us']):
+            lines.append('{:<18} {count:>8} {mean_us:>10.1f} {p99_us:>10.1f} {max_us:>10.1f} '
+                         '{updates_per_event:>8.1f} {p99_updates:>8} {selection_size:>10} '
+                         '{p99_selection:>10}'.format(kind, **stats))
+        return '\n'.join(lines)
+
+    def reset(self):
+        self.kinds = {}
@@ -0,0 +1,217 @@
+# © 2021-2023 Jacob Branch
+# version 1.0.0
+
+import csv
+import datetime
+import os
+
+
+### event providers for ButtonCalendar: holidays and appointments read from large .ics or .csv
+### files. a file is streamed once, on first access, into an index of byte offsets per month;
+### a month's events are parsed from those offsets when it is first shown and cached after.
+### nothing but the index and the months seen so far is held in memory.
+###
+###     ButtonCalendar(events=ICS_Provider('holidays.ics'))
+###     ButtonCalendar(events=CSV_Provider('bookings.csv', date_column='day', title_column='room'))
+###
+### the index and the cache are dropped when the file's modification time changes.
+
+
+
+# month number used as an index key: year * 12 + (month - 1)
+def month_key(ordinal):
+    date = datetime.date.fromordinal(ordinal)
+    return date.year * 12 + date.month - 1
+
+
+# common part of the providers. subclasses implement records(file), yielding
+# (byte offset, first ordinal, last ordinal, title) for every event in a binary file from
+# its current position
+class Event_Provider:
+    def __init__(self, path):
+        self.path = path
+        self.mtime = -1 # st_mtime_ns of the file indexed; None while it is missing, -1 before check()
+        self.index = None # month key -> byte offsets of the events overlapping that month
+        self.months = {} # month key -> {ordinal: (title, ...)}, for months already parsed
+        self.version = 0 # bumped whenever the file is found changed
+
+    # drop the index and the cache if the file changed since it was read. returns self.version.
+    # a missing (or unreadable) file has no events until it is back, rather than breaking the widget
+    def check(self):
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+        except OSError:
+            mtime = None
+        if mtime != self.mtime:
+            self.mtime = mtime
+            self.index = None if mtime is not None else {}
+            self.months = {}
+            self.version += 1
+        return self.version
+
+    # one pass over the file, keeping only each event's offset under the months it overlaps
+    def build_index(self):
+        index = {}
+        with open(self.path, 'rb') as file:
+            for offset, first, last, title in self.records(file):
+                for key in range(month_key(first), month_key(last) + 1):
+                    index.setdefault(key, []).append(offset)
+        self.index = index
+
+    # {ordinal: (title, ...)} for the dates of one month (a month_key) that have events
+    def month_events(self, key):
+        if key in self.months:
+            return self.months[key]
+        if self.index is None:
+            try:
+                self.build_index()
+            except OSError:
+                return {} # removed since check(); the next check() notices, nothing is cached
+
+        events = {}
+        offsets = self.index.get(key, ())
+        if offsets:
+            start = datetime.date(key // 12, key % 12 + 1, 1).toordinal()
+            year, month = divmod(key + 1, 12)
+            end = datetime.date(year, month + 1, 1).toordinal() - 1
+            try:
+                with open(self.path, 'rb') as file:
+                    for offset in offsets:
+                        file.seek(offset)
+                        _, first, last, title = next(self.records(file))
+                        for ordinal in range(max(first, start), min(last, end) + 1):
+                            events.setdefault(ordinal, []).append(title)
+            except OSError:
+                return {} # as above
+        events = {ordinal: tuple(titles) for ordinal, titles in events.items()}
+        self.months[key] = events
+        return events
+
+    # event titles for the 'count' dates from 'first' (an ordinal), one tuple per date.
+    # touches at most the few months the dates fall in, however large the file
+    def window(self, first, count=42):
+        self.check()
+        by_date = {}
+        for key in range(month_key(first), month_key(first + count - 1) + 1):
+            by_date.update(self.month_events(key))
+        return [by_date.get(ordinal, ()) for ordinal in range(first, first + count)]
+
+    # event titles on one date (an ordinal)
+    def get(self, ordinal):
+        self.check()
+        return self.month_events(month_key(ordinal)).get(ordinal, ())
+
+
+# VEVENTs of an iCalendar file: DTSTART, DTEND (exclusive, as in the spec) and SUMMARY.
+# times are reduced to their dates as written (no time zone conversion); RRULE repeats
+# are not expanded, only the first occurrence is shown
+class ICS_Provider(Event_Provider):
+    fields = (b'DTSTART', b'DTEND', b'SUMMARY')
+
+    # works on the raw bytes: only the lines of the properties above are split, and only
+    # summaries are decoded. components nested in a VEVENT (VALARM etc.) are skipped: 'depth'
+    # counts how many are open, and only the VEVENT's own properties are read
+    def records(self, file):
+        offset = file.tell()
+        event = None
+        name = None
+        depth = 0
+        for line in file:
+            start = offset
+            offset += len(line)
+
+            # folded continuation of the previous line
+            if line[:1] in (b' ', b'\t'):
+                if event is not None and name == b'SUMMARY':
+                    event[name] += line[1:].rstrip(b'\r\n')
+                continue
+
+            line = line.rstrip(b'\r\n')
+            name = None
+            if event is None:
+                if line == b'BEGIN:VEVENT':
+                    event = {b'offset': start}
+                    depth = 0
+            elif line[:6] == b'BEGIN:':
+                depth += 1
+            elif depth:
+                if line[:4] == b'END:':
+                    depth -= 1
+            elif line == b'END:VEVENT':
+                if b'DTSTART' in event:
+                    yield self.to_record(event)
+                event = None
+            elif line[:2].upper() in (b'DT', b'SU'):
+                head, _, value = line.partition(b':')
+                name = head.split(b';', 1)[0].upper()
+                if name in ICS_Provider.fields:
+                    event[name] = value
+
+    def to_record(self, event):
+        first = ICS_Provider.to_ordinal(event[b'DTSTART'])
+        last = first
+        if b'DTEND' in event:
+            end = event[b'DTEND']
+            last = ICS_Provider.to_ordinal(end)
+            # the end is exclusive: a whole-day end, or midnight, belongs to the day before
+            if len(end) == 8 or end[9:15] == b'000000':
+                last -= 1
+        summary = event.get(b'SUMMARY', b'').decode('utf-8', 'replace')
+        summary = summary.replace('\\,', ',').replace('\\;', ';').replace('\\n', ' ')
+        return event[b'offset'], first, max(first, last), summary
+
+    # "YYYYMMDD" or "YYYYMMDDTHHMMSS[Z]" -> ordinal of the date
+    def to_ordinal(value):
+        return datetime.date(int(value[0:4]), int(value[4:6]), int(value[6:8])).toordinal()
+
+
+# rows of a CSV file with a header row. 'date_column' (and the optional 'end_column', inclusive)
+# hold "YYYY-MM-DD" dates (anything after the first 10 characters, e.g. a time, is ignored).
+# rows are read one line at a time, so quoted fields must not contain line breaks.
+# the default encoding drops the byte order mark Excel writes at the start of UTF-8 exports
+class CSV_Provider(Event_Provider):
+    def __init__(self, path, date_column='date', title_column='title', end_column=None,
+                 encoding='utf-8-sig', delimiter=','):
+        super().__init__(path)
+        self.date_column = date_column
+        self.title_column = title_column
+        self.end_column = end_column
+        self.encoding = encoding
+        self.delimiter = delimiter
+        self.columns = None # header name -> column index
+
+    def read_header(self):
+        with open(self.path, 'rb') as file:
+            header = self.parse(file.readline())
+        self.columns = {name.strip(): ix for ix, name in enumerate(header)}
+
+    def parse(self, line):
+        return next(csv.reader([line.decode(self.encoding).rstrip('\r\n')], delimiter=self.delimiter))
+
+    def build_index(self):
+        self.read_header()
+        super().build_index()
+
+    def records(self, file):
+        if self.columns is None:
+            self.read_header()
+        columns = self.columns
+        date = columns[self.date_column]
+        end = columns.get(self.end_column, date)
+        title = columns.get(self.title_column)
+
+        offset = file.tell()
+        if offset == 0:
+            offset = len(file.readline()) # skip the header
+        for line in file:
+            start = offset
+            offset += len(line)
+            if not line.strip():
+                continue
+            row = self.parse(line)
+            try:
+                first = datetime.date.fromisoformat(row[date][:10]).toordinal()
+                last = datetime.date.fromisoformat(row[end][:10]).toordinal() if row[end] else first
+            except (ValueError, IndexError):
+                continue # not a dated row
+            yield start, first, max(first, last), row[title] if title is not None and title < len(row) else ''
@@ -0,0 +1,68 @@
+# © 2021-2023 Jacob Branch
+# version 1.0.0
+
+import json
+import time
+
+
+### session recorder for ButtonCalendar(record=...). kept out of calendar_core, since json pulls
+### in re and enum, and only imported by button_calendar when a calendar records.
+
+
+
+# writes the events a calendar handled to a file (see ButtonCalendar(record=...)), so a field
+# session can be replayed headless (benchmarks/bench_replay.py). one JSON value per line:
+#     {header}                 the calendar's view, 'today' and selection when recording started
+#     [seconds, key]           an event, timed from the start
+#     [seconds, key, x, y]     a canvas backend mouse event, with its position on the canvas
+#     {footer}                 the selection when recording stopped
+# lines are written as they come, so a session that crashes is kept up to its last event
+class Event_Recorder:
+    def __init__(self, path):
+        self.path = path
+        self.file = None
+        self.start = None
+        self.count = 0
+
+    def open(self, header):
+        self.file = open(self.path, 'w', encoding='utf-8', buffering=1)
+        self.file.write(json.dumps(header) + '\n')
+        self.start = time.monotonic()
+        self.count = 0
+
+    def record(self, event, position=None):
+        line = [round(time.monotonic() - self.start, 6), event]
+        if position is not None:
+            line.extend(position)
+        self.file.write(json.dumps(line) + '\n')
+        self.count += 1
+
+    def close(self, footer=None):
+        if self.file is None:
+            return
+        if footer is not None:
+            self.file.write(json.dumps(footer) + '\n')
+        self.file.close()
+        self.file = None
+
+    # (header, events, footer) of a recording. events is a list of (seconds, key, position),
+    # position being (x, y) or None. footer is None if the session didn't end cleanly
+    def read(path):
+        header = footer = None
+        events = []
+        with open(path, encoding='utf-8') as file:
+            for line in file:
+                if not line.strip():
+                    continue
+                value = json.loads(line)
+                if isinstance(value, dict):
+                    if header is None:
+                        header = value
+                    else:
+                        footer = value
+                    continue
+                key = value[1]
+                if isinstance(key, list): # tuple keys of the host's own elements
+                    key = tuple(key)
+                events.append((value[0], key, tuple(value[2:4]) if len(value) > 2 else None))
+        return header, events, footer
@@ -0,0 +1,286 @@
+# © 2021-2023 Jacob Branch
+# version 1.0.0
+
+import functools
+import PySimpleGUI as gui
+from calendar_core import Cell, Today, day_names, font, palette
+
+
+### PySimpleGUI elements of ButtonCalendar. imported by button_calendar.load_gui()
+### the first time a calendar is built, so plain imports of the widget stay GUI-free.
+### elements take ButtonCalendar.theme, which is applied while the calendar builds them.
+
+
+# (text, background) button colors. one shared tuple per pair, so repaints don't allocate colors
+@functools.lru_cache(maxsize=256)
+def color_pair(text, background):
+    return (text, background)
+
+
+class Week_Button(gui.Button):
+    def __init__(self, week, key_prefix=''):
+        date_range = [7 * week, 7 * week + 7]
+        # P(date_range)
+        super().__init__(
+            '+/-',
+            size=(3, 1),
+            font=font('calendar_button'),
+            pad=(1, 1),
+            auto_size_button=False,
+            metadata={'date_range': date_range},
+            key=key_prefix + 'week_select_' + str(week),
+            button_color=color_pair(palette['text_default'], palette['default']),
+        )
+
+
+# one date of the grid: its metadata, colors and render state. shared by the Date_Button
+# backend (a Tk button per date) and the Canvas_Cell backend (a cell drawn on a Date_Canvas);
+# subclasses provide update(text=, button_color=, disabled=)
+class Date_Cell:
+    # 'grid' is the Month_Grid of this cell's month, 'ix' its index in the pool.
+    # 'disabled' defaults to past dates. 'heat' is a Heatmap color for the date (or None),
+    # 'events' the titles of the date's events (see calendar_events)
+    def init_cell(self, grid, ix, selected=False, disabled=None, heat=None, events=()):
+        self.metadata = Cell(grid, ix)
+        self.metadata.selected = selected
+        self.metadata.heat = heat
+        self.metadata.events = events
+
+        self.ix = ix
+
+        color = self.get_button_color(selected)
+        if disabled is None:
+            disabled = self.metadata.ordinal < Today.ordinal()
+
+        # (text, button_color, disabled) as last sent to the widget
+        self.rendered = (
+            self.label(),
+            color,
+            disabled,
+        )
+
+    # apply text, color and disabled state in a single update() call.
+    # omitted values keep their current state; nothing is sent if the state is unchanged.
+    # returns True if the widget was updated
+    def render(self, text=None, button_color=None, disabled=None):
+        old_text, old_color, old_disabled = self.rendered
+        if text is None:
+            text = old_text
+        if button_color is None:
+            button_color = old_color
+        if disabled is None:
+            disabled = old_disabled
+        if text == old_text and button_color == old_color and disabled == old_disabled:
+            return False
+
+        self.update(text=text, button_color=button_color, disabled=disabled)
+        self.rendered = (text, button_color, disabled)
+        return True
+
+    def get_button_color(self, selected=False, is_range_select_anchor= False):
+        if selected:
+            color = color_pair(palette['text_selected'], palette['selected'])
+
+        elif is_range_select_anchor:
+            color = color_pair(palette['text_selected'], palette['range_select_anchor'])
+        
+        # unselected, within current month (colored by the heatmap, if any)
+        elif self.metadata.button_month == self.metadata.parent_month:
+            color = color_pair(palette['text_default'], self.metadata.heat or palette['default'])
+            
+        # unselected, outside of current month
+        else:
+            color = color_pair(palette['text_selected'], palette['off_month'])
+
+        return color
+
+    # day of the month, marked if the date has events
+    def name(self, date):
+        if self.metadata.events:
+            return str(date)[-2:] + Date_Cell.event_marker
+        return str(date)[-2:]
+
+    # name() of the cell's own date, without slicing a new string in the common case
+    def label(self):
+        if self.metadata.events:
+            return self.metadata.label + Date_Cell.event_marker
+        return self.metadata.label
+
+    event_marker = '\u2022'
+    
+    def toggle(self, select):
+        self.metadata.selected = select
+        return self.render(button_color=self.get_button_color(selected= select))
+
+    def select(self):
+        return self.toggle(select= True)
+
+    def deselect(self):
+        return self.toggle(select= False)
+        
+    # right-click, init 'range select mode'
+    def set_to_range_select_anchor(self, parent_calendar):
+        parent_calendar.range_select_anchor = self.metadata.ordinal
+        return self.render(
+            button_color=color_pair(palette['text_selected'], palette['range_select_anchor'])
+        )
+        
+    def on_range_select_mouse_over(self, parent_calendar):
+        if parent_calendar.range_select_anchor != self.metadata.ordinal:
+            return self.render(
+                button_color=color_pair(palette['text_selected'], palette['range_select_hover'])
+            )
+        return False
+
+    # color in 'range select' mode: the anchor, a hovered date, or the usual color
+    def get_range_select_color(self, parent_calendar):
+        if parent_calendar.range_select_anchor == self.metadata.ordinal:
+            return color_pair(palette['text_selected'], palette['range_select_anchor'])
+        if self.ix in parent_calendar.highlighted:
+            return color_pair(palette['text_selected'], palette['range_select_hover'])
+        return self.get_button_color(selected=self.metadata.selected)
+
+
+class Date_Button(Date_Cell, gui.Button):
+    def __init__(self,
+                 grid,
+                 ix,
+                 selected=False,
+                 key_prefix='',
+                 disabled=None,
+                 heat=None,
+                 events=()):
+
+        self.init_cell(grid, ix, selected, disabled, heat, events)
+
+        super().__init__(
+            self.rendered[0],
+            key=key_prefix + 'date_btn_' + str(self.ix),
+            size=(3, 1),
+            pad=(1, 1),
+            metadata=self.metadata,
+            button_color=self.rendered[1],
+            font=font('calendar_button'),
+            disabled= self.rendered[2], # past, blacked out or unavailable dates
+        )
+
+
+
+
+# one month of the grid drawn on a single Graph: a row of day names, then 6 weeks of 7 date
+# cells and a week toggle. graph coordinates are canvas pixels (y grows downwards), so the
+# cell under the mouse is found with arithmetic (see hit()). the calendar binds the mouse
+# events (see ButtonCalendar.bind_canvases()); cells are drawn by draw_grid(), once the window is finalized
+class Date_Canvas(gui.Graph):
+    cell_size = (34, 26)
+    header_height = 20
+    columns = 8 # 7 days + week toggle
+
+    def __init__(self, panel, key_prefix=''):
+        self.panel = panel
+        self.cells = [] # the panel's 42 Canvas_Cells, in order
+        self.figures = {} # cell index within the panel -> (rectangle id, text id)
+        self.drawn = False
+
+        width = Date_Canvas.columns * Date_Canvas.cell_size[0]
+        height = Date_Canvas.header_height + 6 * Date_Canvas.cell_size[1]
+        super().__init__(
+            canvas_size=(width, height),
+            graph_bottom_left=(0, height),
+            graph_top_right=(width, 0),
+            key=key_prefix + 'date_canvas_' + str(panel),
+            pad=(0, 0),
+        )
+
+    # (left, top, right, bottom) of the cell in 'column' of week 'row'
+    def cell_box(self, column, row):
+        width, height = Date_Canvas.cell_size
+        left = column * width
+        top = Date_Canvas.header_height + row * height
+        return left + 1, top + 1, left + width - 1, top + height - 1
+
+    # ('date', cell index within the panel), ('week', week within the panel) or None (header, margin)
+    def hit(self, x, y):
+        width, height = Date_Canvas.cell_size
+        column = int(x // width)
+        row = int((y - Date_Canvas.header_height) // height)
+        if y < Date_Canvas.header_height or not (0 <= row < 6 and 0 <= column < Date_Canvas.columns):
+            return None
+        if column == 7:
+            return ('week', row)
+        return ('date', 7 * row + column)
+
+    # draw the header, the week toggles and every cell in its current state
+    def draw_grid(self):
+        self.erase()
+        width, height = Date_Canvas.cell_size
+        for column, label in enumerate(day_names + ('WEEK',)):
+            self.draw_text(
+                label,
+                (column * width + width / 2, Date_Canvas.header_height / 2),
+                font=font('label'),
+            )
+        for row in range(6):
+            left, top, right, bottom = self.cell_box(7, row)
+            self.draw_rectangle(
+                (left, top), (right, bottom), fill_color=palette['default'], line_color=palette['default']
+            )
+            self.draw_text(
+                '+/-', ((left + right) / 2, (top + bottom) / 2),
+                color=palette['text_default'], font=font('calendar_button'),
+            )
+
+        self.figures = {}
+        for cell in self.cells:
+            ix = cell.ix % 42
+            left, top, right, bottom = self.cell_box(ix % 7, ix // 7)
+            text, color, disabled = cell.rendered
+            rectangle = self.draw_rectangle((left, top), (right, bottom), fill_color=color[1], line_color=color[1])
+            label = self.draw_text(
+                text, ((left + right) / 2, (top + bottom) / 2),
+                color=Date_Canvas.text_color(color, disabled), font=font('calendar_button'),
+            )
+            self.figures[ix] = (rectangle, label)
+        self.drawn = True
+
+    # text color of a cell: Tk greys out disabled buttons itself, canvas cells are drawn so
+    def text_color(color, disabled):
+        return palette['text_disabled'] if disabled else color[0]
+
+    # repaint one cell in place: two item configurations, no new figures
+    def paint(self, ix, text, color, disabled):
+        if not self.drawn:
+            return
+        rectangle, label = self.figures[ix % 42]
+        canvas = self.TKCanvas
+        canvas.itemconfig(rectangle, fill=color[1], outline=color[1])
+        canvas.itemconfig(label, text=text, fill=Date_Canvas.text_color(color, disabled))
+
+
+# a date drawn on a Date_Canvas; behaves like a Date_Button (same metadata, colors and
+# render()) without being a widget. 'disabled' cells are drawn greyed out and ignore clicks
+class Canvas_Cell(Date_Cell):
+    def __init__(self,
+                 canvas,
+                 grid,
+                 ix,
+                 selected=False,
+                 key_prefix='',
+                 disabled=None,
+                 heat=None,
+                 events=()):
+
+        self.canvas = canvas
+        self.key = key_prefix + 'date_btn_' + str(ix)
+        self.init_cell(grid, ix, selected, disabled, heat, events)
+        canvas.cells.append(self)
+
+    def update(self, text=None, button_color=None, disabled=None):
+        self.canvas.paint(self.ix, text, button_color, disabled)
+
+    # events are bound once on the Date_Canvas
+    def bind(self, bind_string, key_modifier):
+        pass
+
+    def unbind(self, bind_string):
+        pass
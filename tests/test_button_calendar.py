@@ -0,0 +1,44 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'benchmarks'))
+
+import fake_gui
+
+fake_gui.install()
+
+from button_calendar import ButtonCalendar
+
+
+def test_widget_classes_exist_before_the_first_calendar():
+    assert ButtonCalendar.Date_Button.__name__ == 'Date_Button'
+    assert ButtonCalendar.Canvas_Cell.__name__ == 'Canvas_Cell'
+
+
+def test_subclass_widgets_and_theme():
+    class Cell_Button(ButtonCalendar.Date_Button):
+        pass
+
+    class Week(ButtonCalendar.Week_Button):
+        pass
+
+    themes = []
+
+    class Themed_Week(Week):
+        def __init__(self, *args, **kwargs):
+            themes.append(fake_gui.theme())
+            super().__init__(*args, **kwargs)
+
+    class Calendar(ButtonCalendar):
+        Date_Button = Cell_Button
+        Week_Button = Themed_Week
+        theme = 'SandyBeach'
+
+    fake_gui.theme('DarkBlue3')
+    calendar = Calendar(yyyy_mm_dd='2030-01-15')
+    assert {type(btn) for btn in calendar.button_array} == {Cell_Button}
+    assert set(themes) == {'SandyBeach'}
+    assert fake_gui.theme() == 'DarkBlue3' # the host's theme is restored
+
+    calendar.open_window()
+    assert fake_gui.theme() == 'DarkBlue3'
@@ -0,0 +1,113 @@
+import datetime
+import os
+
+from calendar_events import CSV_Provider, ICS_Provider
+
+
+ICS = b'''BEGIN:VCALENDAR\r
+VERSION:2.0\r
+BEGIN:VEVENT\r
+DTSTART;VALUE=DATE:20300101\r
+DTEND;VALUE=DATE:20300102\r
+SUMMARY:New Year\r
+END:VEVENT\r
+BEGIN:VEVENT\r
+DTSTART:20300110T090000Z\r
+DTEND:20300110T100000Z\r
+SUMMARY:Meet\\, greet and a very long title that is \r
+ folded onto the next line\r
+BEGIN:VALARM\r
+ACTION:EMAIL\r
+SUMMARY:Alarm mail\r
+DTSTART:20300101T000000Z\r
+END:VALARM\r
+END:VEVENT\r
+BEGIN:VEVENT\r
+DTSTART:20300130T220000\r
+DTEND:20300201T000000\r
+SUMMARY:Overnight\r
+END:VEVENT\r
+BEGIN:VEVENT\r
+DTSTART;VALUE=DATE:20300220\r
+DTEND;VALUE=DATE:20300223\r
+SUMMARY:Trip\r
+END:VEVENT\r
+END:VCALENDAR\r
+'''
+
+
+def ordinal(yyyy_mm_dd):
+    return datetime.date.fromisoformat(yyyy_mm_dd).toordinal()
+
+
+def write(path, data):
+    path.write_bytes(data)
+    return str(path)
+
+
+def test_ics_all_day_end_is_exclusive(tmp_path):
+    provider = ICS_Provider(write(tmp_path / 'events.ics', ICS))
+    assert provider.get(ordinal('2030-01-01')) == ('New Year',)
+    assert provider.get(ordinal('2030-01-02')) == ()
+    assert [provider.get(ordinal('2030-02-' + day)) for day in ('20', '22', '23')] == [('Trip',), ('Trip',), ()]
+
+
+def test_ics_folded_summary_and_nested_alarm(tmp_path):
+    provider = ICS_Provider(write(tmp_path / 'events.ics', ICS))
+    assert provider.get(ordinal('2030-01-10')) == (
+        'Meet, greet and a very long title that is folded onto the next line',
+    )
+
+
+def test_ics_timed_end_at_midnight_belongs_to_the_day_before(tmp_path):
+    provider = ICS_Provider(write(tmp_path / 'events.ics', ICS))
+    assert provider.get(ordinal('2030-01-30')) == ('Overnight',)
+    assert provider.get(ordinal('2030-01-31')) == ('Overnight',)
+    assert provider.get(ordinal('2030-02-01')) == ()
+
+
+def test_window_spans_months(tmp_path):
+    provider = ICS_Provider(write(tmp_path / 'events.ics', ICS))
+    titles = provider.window(ordinal('2030-01-27'), 42)
+    assert titles[3] == ('Overnight',)
+    assert titles[ordinal('2030-02-21') - ordinal('2030-01-27')] == ('Trip',)
+    assert sum(1 for day in titles if day) == 5
+
+
+def test_changed_file_is_reindexed(tmp_path):
+    path = write(tmp_path / 'events.ics', ICS)
+    provider = ICS_Provider(path)
+    assert provider.get(ordinal('2030-01-01')) == ('New Year',)
+    version = provider.version
+
+    write(tmp_path / 'events.ics', ICS.replace(b'New Year', b'Hogmanay'))
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+    assert provider.get(ordinal('2030-01-01')) == ('Hogmanay',)
+    assert provider.version == version + 1
+
+
+def test_csv_with_byte_order_mark(tmp_path):
+    csv = '﻿day,room,until\r\n2030-01-05,Blue,\r\n2030-01-31T09:00,"Red, large",2030-02-02\r\nnot a date,x,\r\n'
+    provider = CSV_Provider(
+        write(tmp_path / 'bookings.csv', csv.encode('utf-8')),
+        date_column='day', title_column='room', end_column='until',
+    )
+    assert provider.get(ordinal('2030-01-05')) == ('Blue',)
+    assert [provider.get(ordinal(day)) for day in ('2030-01-31', '2030-02-02', '2030-02-03')] == [
+        ('Red, large',), ('Red, large',), (),
+    ]
+
+
+def test_missing_file_has_no_events(tmp_path):
+    path = str(tmp_path / 'bookings.csv')
+    provider = CSV_Provider(path)
+    assert provider.window(ordinal('2030-01-01'), 7) == [()] * 7
+
+    write(tmp_path / 'bookings.csv', b'date,title\n2030-01-03,Dentist\n')
+    assert provider.get(ordinal('2030-01-03')) == ('Dentist',)
+
+    version = provider.version
+    os.remove(path)
+    assert provider.window(ordinal('2030-01-01'), 7) == [()] * 7
+    assert provider.version == version + 1
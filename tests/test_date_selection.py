@@ -0,0 +1,92 @@
+import random
+
+import pytest
+
+from calendar_core import Date_Selection
+
+
+# small chunks, so a few dozen dates already span many of them
+@pytest.fixture(autouse=True)
+def small_chunks(monkeypatch):
+    monkeypatch.setattr(Date_Selection, 'chunk_size', 4)
+
+
+def check(selection, expected):
+    assert list(selection) == sorted(expected)
+    assert len(selection) == len(expected)
+    chunks = selection._chunks
+    assert all(chunks) # no empty chunks
+    assert selection._maxes == [chunk[-1] for chunk in chunks]
+    assert all(len(chunk) <= 2 * Date_Selection.chunk_size for chunk in chunks)
+
+
+def test_range_operations_across_chunks():
+    selection = Date_Selection(range(100, 140, 3))
+    expected = set(range(100, 140, 3))
+
+    assert selection.update_range(110, 125) == set(range(110, 126)) - expected
+    expected |= set(range(110, 126))
+    check(selection, expected)
+
+    assert selection.difference_update_range(105, 115) == expected & set(range(105, 116))
+    expected -= set(range(105, 116))
+    check(selection, expected)
+
+    # spans outside, around and at the ends of the selection
+    for first, last in ((50, 60), (90, 101), (136, 200), (0, 1000)):
+        selection.update_range(first, last)
+        expected |= set(range(first, last + 1))
+        check(selection, expected)
+    selection.difference_update_range(0, 1000)
+    check(selection, set())
+
+
+# applying the popped (added, removed) to the previous state gives the current one,
+# which is what Selection_File appends
+def test_changes_since_pop():
+    selection = Date_Selection([1, 2, 3])
+    selection.pop_changes()
+    before = set(selection)
+    selection.update_range(3, 6)
+    selection.difference_update_range(1, 2)
+    selection.add(1)
+    selection.discard(6)
+    added, removed = selection.pop_changes()
+    assert not added & removed
+    assert (before - removed) | added == set(selection) == {1, 3, 4, 5}
+    assert selection.pop_changes() == (set(), set())
+
+
+@pytest.mark.parametrize('seed', range(20))
+def test_matches_a_set(seed):
+    rng = random.Random(seed)
+    selection = Date_Selection()
+    expected = set()
+    version = selection.version
+    for step in range(300):
+        first = rng.randrange(0, 200)
+        last = first + rng.randrange(0, 30)
+        op = rng.randrange(6)
+        if op == 0:
+            assert selection.add(first) == (first not in expected)
+            expected.add(first)
+        elif op == 1:
+            assert selection.discard(first) == (first in expected)
+            expected.discard(first)
+        elif op == 2:
+            dates = rng.sample(range(200), rng.randrange(0, 20))
+            assert selection.update(dates) == set(dates) - expected
+            expected.update(dates)
+        elif op == 3:
+            dates = rng.sample(range(200), rng.randrange(0, 20))
+            assert selection.difference_update(dates) == expected & set(dates)
+            expected.difference_update(dates)
+        elif op == 4:
+            assert selection.update_range(first, last) == set(range(first, last + 1)) - expected
+            expected.update(range(first, last + 1))
+        else:
+            assert selection.difference_update_range(first, last) == expected & set(range(first, last + 1))
+            expected.difference_update(range(first, last + 1))
+        check(selection, expected)
+        assert selection.version >= version
+        version = selection.version
@@ -0,0 +1,66 @@
+import random
+
+import pytest
+
+from calendar_core import Interval_Index, to_ordinal
+
+
+def test_overlapping_and_adjacent_intervals_merge():
+    index = Interval_Index([(10, 12), (13, 15), (20, 25), (22, 30), (40, 39), (5, 5)])
+    assert list(index) == [(5, 5), (10, 15), (20, 30)] # (40, 39) is empty
+    assert len(index) == 3
+
+
+def test_date_strings():
+    index = Interval_Index([('2030-01-10', '2030-01-12')])
+    assert to_ordinal('2030-01-11') in index
+    assert to_ordinal('2030-01-13') not in index
+
+
+def test_queries():
+    index = Interval_Index([(10, 15), (20, 30)])
+    assert [date in index for date in (9, 10, 15, 16, 20, 30, 31)] == [False, True, True, False, True, True, False]
+    assert list(index.overlapping(12, 25)) == [(12, 15), (20, 25)]
+    assert list(index.overlapping(16, 19)) == []
+    assert list(index.gaps(5, 35)) == [(5, 9), (16, 19), (31, 35)]
+    assert list(index.gaps(10, 30)) == [(16, 19)]
+    assert index.mask(13, 9) == [True, True, True, False, False, False, False, True, True]
+
+
+def brute_force(intervals):
+    return {date for first, last in intervals for date in range(first, last + 1)}
+
+
+def runs(dates):
+    return sorted({(date, date) for date in dates})
+
+
+def merge(pairs):
+    merged = []
+    for first, last in pairs:
+        if merged and first == merged[-1][1] + 1:
+            merged[-1] = (merged[-1][0], last)
+        else:
+            merged.append((first, last))
+    return merged
+
+
+@pytest.mark.parametrize('seed', range(20))
+def test_matches_brute_force(seed):
+    rng = random.Random(seed)
+    intervals = []
+    for interval in range(rng.randrange(0, 15)):
+        first = rng.randrange(0, 100)
+        intervals.append((first, first + rng.randrange(-2, 15)))
+    index = Interval_Index(intervals)
+    covered = brute_force(intervals)
+
+    assert list(index) == merge(runs(covered))
+    for query in range(20):
+        first = rng.randrange(-5, 110)
+        last = first + rng.randrange(0, 40)
+        span = set(range(first, last + 1))
+        assert all((date in index) == (date in covered) for date in span)
+        assert list(index.overlapping(first, last)) == merge(runs(covered & span))
+        assert list(index.gaps(first, last)) == merge(runs(span - covered))
+        assert index.mask(first, last - first + 1) == [date in covered for date in range(first, last + 1)]
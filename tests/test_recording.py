@@ -0,0 +1,65 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'benchmarks'))
+
+import fake_gui
+import pytest
+
+fake_gui.install()
+
+import bench_replay
+from button_calendar import ButtonCalendar
+from calendar_core import Today
+from calendar_recorder import Event_Recorder
+
+
+# the replay pins Today; let the next test read the real date again
+@pytest.fixture(autouse=True)
+def unpin_today():
+    yield
+    Today.tick()
+
+
+# records 'events' on a framed calendar opened on 'yyyy_mm_dd', after 'before' (not recorded),
+# the way the README tells a host to. returns the path of the recording
+def record(tmp_path, yyyy_mm_dd, before, events, **kwargs):
+    bench_replay.pin_today('2030-01-01')
+    path = str(tmp_path / 'session.jsonl')
+    calendar = ButtonCalendar(yyyy_mm_dd=yyyy_mm_dd, record=path, **kwargs)
+    window = fake_gui.Window('record', layout=[[calendar.frame]])
+    calendar.post_finalize(window)
+    for event in before:
+        calendar.handle_event(event, window)
+
+    calendar.recorder.open(calendar.recording_header())
+    for event in events:
+        calendar.record_event(event)
+        calendar.handle_event(event, window)
+    calendar.recorder.close({'selected': calendar.get_selected_intervals()})
+    return path
+
+
+def replayed_selection(path):
+    header, events, footer = Event_Recorder.read(path)
+    calendar, seconds = bench_replay.replay(header, events)
+    return [list(interval) for interval in calendar.get_selected_intervals()], footer['selected']
+
+
+def test_replay_matches_recording(tmp_path):
+    path = record(tmp_path, '2030-01-15', (), [
+        'date_btn_20', 'forward_month', 'date_btn_10_right_click_', 'date_btn_14_mouse_over_',
+        'date_btn_16', 'week_select_4', 'a', 'back_month', 'date_btn_20',
+    ])
+    replayed, recorded = replayed_selection(path)
+    assert replayed == recorded
+    assert len(recorded) > 1
+
+
+# opened on the 31st and moved to a shorter month before recording starts
+def test_header_of_a_view_without_the_opening_day(tmp_path):
+    path = record(tmp_path, '2030-01-31', ('forward_month',), ['date_btn_12', 'date_btn_20'])
+    header, events, footer = Event_Recorder.read(path)
+    assert header['yyyy_mm_dd'] == '2030-02-01'
+    replayed, recorded = replayed_selection(path)
+    assert replayed == recorded
@@ -0,0 +1,114 @@
+import os
+
+import pytest
+
+from calendar_core import Date_Selection, Selection_File
+
+
+HEADER = Selection_File.header.size
+RECORD = Selection_File.record.size
+
+
+def save(store, selection):
+    store.save(selection, selection.pop_changes())
+
+
+def load(path):
+    return Selection_File(path).load()
+
+
+def test_snapshot_then_appended_changes(tmp_path):
+    path = str(tmp_path / 'dates.bcal')
+    selection = Date_Selection(list(range(1000, 1010)) + [1020])
+    store = Selection_File(path)
+    save(store, selection)
+    assert os.path.getsize(path) == HEADER + 2 * RECORD # two runs
+    assert load(path) == set(selection)
+
+    selection.difference_update_range(1003, 1004)
+    selection.add(1030)
+    save(store, selection)
+    # appended: the removed run, then the added one
+    assert os.path.getsize(path) == HEADER + 4 * RECORD
+    assert load(path) == set(selection)
+
+
+def test_reopened_file_appends(tmp_path):
+    path = str(tmp_path / 'dates.bcal')
+    selection = Date_Selection(range(1000, 1010))
+    save(Selection_File(path), selection)
+
+    store = Selection_File(path)
+    selection = Date_Selection(store.load())
+    selection.pop_changes()
+    selection.discard(1005)
+    save(store, selection)
+    assert os.path.getsize(path) == HEADER + 2 * RECORD
+    assert load(path) == set(range(1000, 1010)) - {1005}
+
+
+def test_log_is_compacted_once_it_has_grown(tmp_path):
+    path = str(tmp_path / 'dates.bcal')
+    selection = Date_Selection([1000])
+    store = Selection_File(path)
+    save(store, selection)
+
+    # toggling one date appends a record per save, until the log outgrows the snapshot
+    sizes = []
+    for toggle in range(300):
+        if 2000 in selection:
+            selection.discard(2000)
+        else:
+            selection.add(2000)
+        save(store, selection)
+        sizes.append(os.path.getsize(path))
+
+    # one record appended per save while the log holds up to 2 * snapshot + 256 records
+    # (1 snapshot record here), then the next save rewrites a fresh snapshot
+    peak = sizes.index(max(sizes))
+    assert max(sizes) == HEADER + (2 * 1 + 256 + 1) * RECORD
+    assert all(after - before == RECORD for before, after in zip(sizes[:peak], sizes[1:peak + 1]))
+    assert sizes[peak + 1] <= HEADER + 2 * RECORD
+    assert load(path) == set(selection)
+
+
+def test_torn_trailing_record_is_ignored_and_rewritten(tmp_path):
+    path = str(tmp_path / 'dates.bcal')
+    selection = Date_Selection(range(1000, 1010))
+    store = Selection_File(path)
+    save(store, selection)
+    selection.add(1020)
+    save(store, selection)
+
+    # a crash halfway through the last append
+    with open(path, 'r+b') as file:
+        file.truncate(os.path.getsize(path) - RECORD // 2)
+
+    store = Selection_File(path)
+    assert store.load() == set(range(1000, 1010))
+    assert not store.in_sync
+
+    selection = Date_Selection(range(1000, 1010))
+    selection.pop_changes()
+    selection.add(1030)
+    save(store, selection)
+    # rewritten as a snapshot rather than appended after the torn bytes
+    assert os.path.getsize(path) == HEADER + 2 * RECORD
+    assert load(path) == set(range(1000, 1010)) | {1030}
+
+
+def test_missing_file_loads_empty(tmp_path):
+    store = Selection_File(str(tmp_path / 'missing.bcal'))
+    assert store.load() == set()
+    assert not store.in_sync
+
+
+@pytest.mark.parametrize('header', [
+    Selection_File.header.pack(b'XCAL', Selection_File.version, 0),
+    Selection_File.header.pack(Selection_File.magic, Selection_File.version + 1, 0),
+])
+def test_foreign_files_are_rejected(tmp_path, header):
+    path = tmp_path / 'other.bcal'
+    path.write_bytes(header + Selection_File.record.pack(1, 1000, 1001))
+    with pytest.raises(ValueError):
+        Selection_File(str(path)).load()